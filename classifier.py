@@ -2,15 +2,44 @@
 classifier.py — Sends extracted text to Google Gemini Flash and
 returns structured classification data (category, filename, summary).
 
-Uses a strict "librarian" system prompt that forces JSON-only output.
+Uses a strict "librarian" system prompt plus Gemini's structured output
+(response schema) to get JSON-only replies.
 Supports dynamic categories: checks VALID_CATEGORIES first, then
 existing folders in organized_storage, and creates new ones if needed.
+
+Decisions are cached in SQLite by a hash of (system prompt + normalised
+text), so re-dropping the same document never pays for a second API call. On a miss,
+semantic_cache.py gets a chance to match a near-duplicate by embedding.
 """
 
+import io
 import os
-import json
+import re
+import logging
+import asyncio
+import orjson
+import time
+import hashlib
+import datetime
+import threading
+from typing import Optional
 import google.generativeai as genai
+from google.generativeai import caching
+from google.api_core.exceptions import ResourceExhausted
+from google import genai as google_genai
 from dotenv import load_dotenv
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+# Local modules
+from db import logger as cache  # SQLite-backed classification cache
+from semantic_cache import index as semantic_index  # near-duplicate cache
 
 # Load API key from .env file to keep it secure
 load_dotenv()
@@ -27,23 +56,202 @@ VALID_CATEGORIES = [
     "Finance",
 ]
 
+# Structured output: Gemini must answer with JSON matching this schema
+RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "summary_sentence": {"type": "STRING"},
+        "category": {"type": "STRING"},
+        "suggested_filename": {"type": "STRING"},
+    },
+    "required": ["summary_sentence", "category", "suggested_filename"],
+}
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": RESPONSE_SCHEMA,
+}
+# classify_batch(): several documents in one request, one object per document,
+# each carrying its "=== DOCUMENT n ===" number so it can be matched back
+BATCH_ITEM_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {"document": {"type": "INTEGER"}, **RESPONSE_SCHEMA["properties"]},
+    "required": ["document", *RESPONSE_SCHEMA["required"]],
+}
+BATCH_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {"type": "ARRAY", "items": BATCH_ITEM_SCHEMA},
+}
+
+# Documents longer than SAMPLE_THRESHOLD chars are sent as the first
+# SAMPLE_HEAD chars plus SAMPLE_MIDDLE chars from the middle
+# (processor.PREVIEW_MAX_CHARS must not exceed SAMPLE_THRESHOLD)
+SAMPLE_THRESHOLD = 8000
+SAMPLE_HEAD = 2000
+SAMPLE_MIDDLE = 1000
+
+# Explicit context caching of the system prompt
+CONTEXT_CACHE_TTL = 3600     # seconds the cache lives on Google's side
+CONTEXT_CACHE_MARGIN = 60    # rebuild this many seconds before it expires
+
+# Rate-limit retries (429 quota exceeded)
+RETRY_ATTEMPTS = 5
+RETRY_BASE_DELAY = 2   # seconds, doubled on each attempt
+RETRY_MAX_DELAY = 60   # seconds
+
+# Batch API polling (jobs can take minutes to hours to finish)
+BATCH_POLL_INTERVAL = 30  # seconds between batches.get calls
+BATCH_DONE_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+# The "Librarian" persona; {categories} is filled with the current category list
+SYSTEM_PROMPT_TEMPLATE = """\
+You are a meticulous research librarian and file-organisation expert.
+
+Your job:
+1. Read the document text provided by the user.
+2. Decide which category it belongs to.
+3. Suggest a clean, descriptive filename.
+4. Write a one-sentence summary.
+
+Rules:
+- Output ONLY a valid JSON object. No markdown, no explanation, no extra text.
+- The JSON must have exactly 3 keys:
+  {{
+    "summary_sentence": "A concise one-sentence summary of the document.",
+    "category": "The best-fit category name",
+    "suggested_filename": "year_topic_snake_case.pdf"
+  }}
+
+Category selection (FOLLOW THIS PRIORITY ORDER):
+  1. FIRST, try to fit the document into one of these EXISTING categories: {categories}
+  2. If NONE of the existing categories fit well, you MAY create a NEW category.
+     - New category names must be short (1-3 words), Title Case, and descriptive.
+     - Examples: "History", "Philosophy", "Cooking", "Health", "Legal".
+  3. Use "Personal" ONLY for truly personal documents (letters, journals, notes).
+
+- For "suggested_filename":
+  • Start with the year if you can detect it (e.g. 2026_).
+  • Use lowercase snake_case.
+  • Keep the same file extension as the original.
+- Do NOT wrap your response in ```json``` or any other formatting.
+"""
+
+# Keyword fallback for documents too short to be worth an LLM call.
+# The first keyword found in the text decides the category.
+KEYWORD_CATEGORIES = {
+    "Finance": ["invoice", "receipt", "bank statement", "payslip", "tax return",
+                "amount due", "billing"],
+    "Personal": ["resume", "curriculum vitae", "cover letter", "passport",
+                 "boarding pass", "itinerary", "reservation"],
+    "Systems CS": ["kernel", "compiler", "operating system", "distributed system"],
+    "ML-Bio": ["protein", "genome", "neural network", "gene expression"],
+}
+
 # Path to where files are organized
 STORAGE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "organized_storage")
 
+# One alternation with a named group per category, so a single scan of the
+# text finds the first keyword and tells us which category it belongs to
+_KEYWORD_GROUPS = {f"c{i}": category for i, category in enumerate(KEYWORD_CATEGORIES)}
+_KEYWORD_RE = re.compile(
+    "|".join(
+        rf"(?P<{group}>\b(?:{'|'.join(map(re.escape, KEYWORD_CATEGORIES[category]))})\b)"
+        for group, category in _KEYWORD_GROUPS.items()
+    ),
+    re.IGNORECASE,
+)
+
+log = logging.getLogger(__name__)
+
+# ── Lazily initialised singletons ───────────────────────────────────
+_configured = False    # genai.configure() has run
+_prompt_cache = None   # (categories, rendered system prompt)
+_model_cache = None    # (system_prompt, GenerativeModel, expires_at, CachedContent | None)
+_model_lock = threading.Lock()
+_batch_client = None   # google_genai.Client for the Batch API
+
+
+class CategorySet(FileSystemEventHandler):
+    """
+    Live set of category folder names in organized_storage/.
+    Filled once with os.scandir, then kept current by a watchdog observer,
+    so classification never has to rescan the folder.
+    """
+
+    def __init__(self, root: str):
+        super().__init__()
+        self.root = root
+        self._lock = threading.Lock()
+        self._names = set()
+        self._observer = None
+
+    def start(self):
+        """Take the initial scan and start watching (no-op if already running)."""
+        with self._lock:
+            if self._observer is not None:
+                return
+            os.makedirs(self.root, exist_ok=True)
+
+            # Start watching before scanning so nothing created in between is missed
+            observer = Observer()
+            observer.schedule(self, self.root, recursive=False)
+            observer.start()
+
+            with os.scandir(self.root) as entries:
+                self._names = {
+                    e.name for e in entries
+                    if e.is_dir() and not e.name.startswith("_")
+                }
+            self._observer = observer
+
+    def snapshot(self) -> set[str]:
+        """Return a copy of the current category names."""
+        self.start()
+        with self._lock:
+            return set(self._names)
+
+    # ── watchdog callbacks ──────────────────────────────────────────
+
+    def on_created(self, event):
+        if event.is_directory:
+            self._add(event.src_path)
+
+    def on_deleted(self, event):
+        # Some platforms don't flag deleted entries as directories, and
+        # discarding a name that isn't a category is harmless
+        self._discard(event.src_path)
+
+    def on_moved(self, event):
+        self._discard(event.src_path)
+        if event.is_directory:
+            self._add(event.dest_path)
+
+    def _add(self, path: str):
+        name = os.path.basename(path)
+        if not name.startswith("_"):
+            with self._lock:
+                self._names.add(name)
+
+    def _discard(self, path: str):
+        with self._lock:
+            self._names.discard(os.path.basename(path))
+
+
+# Shared, lazily started on first use
+CATEGORY_SET = CategorySet(STORAGE_ROOT)
+
 
 def _get_existing_folders() -> list[str]:
     """
-    Scan organized_storage/ and return a list of existing category folder names.
+    Return the existing category folder names in organized_storage/.
     This allows the AI to discover categories you manually created.
     Excludes internal folders that start with '_' (like _unclassified, _unsupported).
     """
-    if not os.path.isdir(STORAGE_ROOT):
-        return []
-    return [
-        name for name in os.listdir(STORAGE_ROOT)
-        if os.path.isdir(os.path.join(STORAGE_ROOT, name))
-        and not name.startswith("_")
-    ]
+    return sorted(CATEGORY_SET.snapshot())
 
 
 def _get_all_categories() -> list[str]:
@@ -61,135 +269,643 @@ def _build_system_prompt() -> str:
     """
     Build the system prompt dynamically.
     Injects the current list of folders so the AI knows valid destinations.
-    Sets the "Librarian" persona and enforces strict JSON output.
+    The prompt is only re-rendered when that list changes.
     """
-    all_cats = _get_all_categories()
+    global _prompt_cache
 
-    return f"""\
-You are a meticulous research librarian and file-organisation expert.
+    categories = _get_all_categories()
+    cached = _prompt_cache
+    if cached is not None and cached[0] == categories:
+        return cached[1]
 
-Your job:
-1. Read the document text provided by the user.
-2. Decide which category it belongs to.
-3. Suggest a clean, descriptive filename.
-4. Write a one-sentence summary.
+    prompt = SYSTEM_PROMPT_TEMPLATE.format(categories=categories)
+    _prompt_cache = (categories, prompt)
+    return prompt
 
-Rules:
-- Output ONLY a valid JSON object. No markdown, no explanation, no extra text.
-- The JSON must have exactly 3 keys:
-  {{
-    "summary_sentence": "A concise one-sentence summary of the document.",
-    "category": "The best-fit category name",
-    "suggested_filename": "year_topic_snake_case.pdf"
-  }}
 
-Category selection (FOLLOW THIS PRIORITY ORDER):
-  1. FIRST, try to fit the document into one of these EXISTING categories: {all_cats}
-  2. If NONE of the existing categories fit well, you MAY create a NEW category.
-     - New category names must be short (1-3 words), Title Case, and descriptive.
-     - Examples: "History", "Philosophy", "Cooking", "Health", "Legal".
-  3. Use "Personal" ONLY for truly personal documents (letters, journals, notes).
 
-- For "suggested_filename":
-  • Start with the year if you can detect it (e.g. 2026_).
-  • Use lowercase snake_case.
-  • Keep the same file extension as the original.
-- Do NOT wrap your response in ```json``` or any other formatting.
-"""
+def _get_batch_client():
+    """Return the google-genai client for the Batch API (the legacy SDK has no batches)."""
+    global _batch_client
+
+    if _batch_client is not None:
+        return _batch_client
+    if not GEMINI_API_KEY:
+        raise EnvironmentError(
+            "GEMINI_API_KEY is not set. "
+            "Create a .env file with GEMINI_API_KEY=your-key-here"
+        )
+    _batch_client = google_genai.Client(api_key=GEMINI_API_KEY)
+    return _batch_client
 
 
 def _configure_client():
-    """Initialise the Google Gemini client with the API key."""
+    """Initialise the Google Gemini client with the API key (once per process)."""
+    global _configured
+
+    if _configured:
+        return
     if not GEMINI_API_KEY:
         raise EnvironmentError(
             "GEMINI_API_KEY is not set. "
             "Create a .env file with GEMINI_API_KEY=your-key-here"
         )
     genai.configure(api_key=GEMINI_API_KEY)
+    _configured = True
 
 
-def classify_file(text: str, original_filename: str) -> dict:
+def warm_up():
     """
-    The Main Intelligence Function.
-    Sends extracted text + original filename to Gemini Flash.
+    Do the one-off setup before the first file arrives: configure the client,
+    scan the category folders and build the model (with its context cache).
+    Every later call reuses that model and its connection.
+    Failures are only reported; classify_file() retries the setup itself.
+    """
+    try:
+        _build_model(_build_system_prompt())
+    except Exception as e:
+        log.warning(f"[classifier] WARNING: Warm-up failed: {e}")
 
-    Steps:
-    1. Prepare prompt with filename and text.
-    2. Call Gemini API.
-    3. Clean and parse JSON response.
-    4. Validate and sanitize keys.
-    5. Return decision to watcher.py.
+
+def close_clients():
     """
-    _configure_client()
+    Delete the live context cache and close the Batch API client's
+    connections (call once on shutdown, after all classifications finished).
+    """
+    global _batch_client, _model_cache
 
-    # Preserve the original extension (e.g., .pdf) to use in the new filename
-    ext = os.path.splitext(original_filename)[1].lower() or ".pdf"
+    with _model_lock:
+        if _model_cache is not None:
+            _delete_context_cache(_model_cache[3])
+            _model_cache = None
+
+    if _batch_client is not None:
+        _batch_client.close()
+        _batch_client = None
+
+
+def _sample_text(text: str) -> str:
+    """
+    Shrink long documents before sending them: the opening SAMPLE_HEAD chars
+    plus a SAMPLE_MIDDLE-char slice from the middle carry the category signal
+    (intro + body) for a fraction of the tokens.
+    """
+    if len(text) <= SAMPLE_THRESHOLD:
+        return text
+    mid = (len(text) - SAMPLE_MIDDLE) // 2
+    return f"{text[:SAMPLE_HEAD]}\n[...]\n{text[mid:mid + SAMPLE_MIDDLE]}"
 
-    user_prompt = (
+
+def _build_user_prompt(text: str, original_filename: str) -> str:
+    """Wrap the (sampled) text and original filename into the user message."""
+    return (
         f"Original filename: {original_filename}\n\n"
-        f"--- DOCUMENT TEXT ---\n{text}\n--- END ---"
+        f"--- DOCUMENT TEXT ---\n{_sample_text(text)}"
     )
 
+
+def _build_batch_prompt(items: list[tuple[str, str]]) -> str:
+    """Number the documents so each reply entry can be matched back by its number."""
+    parts = [
+        f"Classify each of the following {len(items)} documents independently. "
+        f"Reply with a JSON array of exactly {len(items)} objects, one per "
+        f"document, each with \"document\" set to that document's number."
+    ]
+    for n, (text, original_filename) in enumerate(items, 1):
+        parts.append(f"=== DOCUMENT {n} ===\n{_build_user_prompt(text, original_filename)}")
+    return "\n\n".join(parts)
+
+
+def _keyword_match(text: str) -> Optional[tuple[str, str]]:
+    """Return (category, keyword) for the first KEYWORD_CATEGORIES hit, or None."""
+    match = _KEYWORD_RE.search(text)
+    if match is None:
+        return None
+    return _KEYWORD_GROUPS[match.lastgroup], match.group(0)
+
+
+def keyword_classify(text: str, original_filename: str) -> Optional[dict]:
+    """
+    Cheap heuristic decision for very short documents, without calling Gemini.
+    Keeps the original filename; returns None if no keyword matches.
+    """
+    hit = _keyword_match(text)
+    if hit is None:
+        return None
+    category, keyword = hit
+    log.info(f"[classifier] Keyword match '{keyword}' → {category}")
+    return {
+        "summary_sentence": f"Short document matched the keyword '{keyword.lower()}'.",
+        "category": category,
+        "suggested_filename": original_filename,
+    }
+
+
+def _fallback_result(summary: str, original_filename: str) -> dict:
+    """The 'give up' decision: keep the name and park the file in _unclassified."""
+    return {
+        "summary_sentence": summary,
+        "category": "_unclassified",
+        "suggested_filename": original_filename,
+    }
+
+
+def _ensure_extension(result: dict, original_filename: str) -> dict:
+    """Make sure the suggested filename keeps the original file extension."""
+    ext = os.path.splitext(original_filename)[1].lower() or ".pdf"
+    if not result["suggested_filename"].endswith(ext):
+        result["suggested_filename"] += ext
+    return result
+
+
+def _cache_key(text: str, system_prompt: str) -> str:
+    """
+    Hash of everything that determines the LLM's answer.
+    The system prompt is included so adding a category invalidates old entries.
+    The text is lowercased and its whitespace collapsed first, so copies that
+    differ only in case or line wrapping share one entry.
+    """
+    normalized = " ".join(text.lower().split())
+    return hashlib.blake2b((system_prompt + normalized).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cache_lookup(key: str, original_filename: str) -> Optional[dict]:
+    """Return a cached decision adapted to this file's extension, or None."""
+    cached = cache.get_cached(key)
+    if cached is None:
+        return None
+    log.info(f"[classifier] Cache hit for '{original_filename}'")
+    return _ensure_extension(cached, original_filename)
+
+
+def lookup_cached(text: str, original_filename: str) -> Optional[dict]:
+    """
+    Return the exact-cache decision for `text`, or None on a miss.
+    Lets callers skip queueing a document for classification when its
+    answer is already known; classify_file() does the same check itself.
+    """
+    return _cache_lookup(_cache_key(text, _build_system_prompt()), original_filename)
+
+
+def _lookup_many(items: list[tuple[str, str]], system_prompt: str):
+    """
+    Run both cache tiers over a list of (text, filename) items.
+    Returns (keys, results, vectors): results[i] is None for items that still
+    need the LLM, and vectors maps those indexes to their embeddings.
+    """
+    keys = [_cache_key(text, system_prompt) for text, _ in items]
+    results = [_cache_lookup(key, name) for key, (_, name) in zip(keys, items)]
+    misses = [i for i, r in enumerate(results) if r is None]
+    if not misses:
+        return keys, results, {}
+
+    # Second tier: near-duplicates of documents we've already classified
+    _configure_client()
+    vectors = dict(zip(misses, semantic_index.embed_many([items[i][0] for i in misses])))
+    for i in misses:
+        similar = semantic_index.lookup(vectors[i], items[i][1])
+        if similar is not None:
+            results[i] = _ensure_extension(similar, items[i][1])
+    return keys, results, vectors
+
+
+def _parse_response(raw: str, original_filename: str) -> dict:
+    """
+    Turn the raw LLM reply into a validated decision dict.
+    Shared by the single-file and batch paths.
+
+    Raises:
+        orjson.JSONDecodeError / ValueError / KeyError: If the reply is unusable.
+    """
+    # Structured output (GENERATION_CONFIG) guarantees plain JSON, no fences
+    return _validate_result(orjson.loads(raw), original_filename)
+
+
+def _parse_batch_response(raw: str, items: list[tuple[str, str]]) -> list[Optional[dict]]:
+    """
+    Split a classify_batch() reply into one decision per item.
+    Entries are matched to items by their "document" number, never by
+    position, so a reordered reply can't swap two files' decisions. An item
+    whose entry is malformed, missing or claimed twice comes back as None
+    instead of failing the rest.
+
+    Raises:
+        orjson.JSONDecodeError / ValueError: If the reply isn't one array entry per item.
+    """
+    entries = orjson.loads(raw)
+    if not isinstance(entries, list) or len(entries) != len(items):
+        raise ValueError(f"Expected a list of {len(items)} results")
+
+    # document number (1-based) -> entries claiming it
+    claimed = {}
+    for entry in entries:
+        n = entry.get("document") if isinstance(entry, dict) else None
+        if isinstance(n, int) and not isinstance(n, bool) and 1 <= n <= len(items):
+            claimed.setdefault(n, []).append(entry)
+
+    results = []
+    for n, (_, original_filename) in enumerate(items, 1):
+        matches = claimed.get(n, [])
+        try:
+            if len(matches) != 1:
+                raise ValueError(f"{len(matches)} entries for document {n}")
+            entry = dict(matches[0])
+            del entry["document"]
+            results.append(_validate_result(entry, original_filename))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            log.warning(f"[classifier] WARNING: Bad batch entry for '{original_filename}': {e}")
+            results.append(None)
+    return results
+
+
+def _validate_result(result: dict, original_filename: str) -> dict:
+    """Check and sanitise one decision dict (see _parse_response)."""
+    if not isinstance(result, dict):
+        raise ValueError("Result is not an object")
+
+    # Validate required keys exist
+    for key in ("summary_sentence", "category", "suggested_filename"):
+        if key not in result:
+            raise ValueError(f"Missing key: {key}")
+
+    _ensure_extension(result, original_filename)
+
+    # Sanitise the category name (remove headers/slashes to avoid bad paths)
+    result["category"] = result["category"].strip().replace("/", "-").replace("\\", "-")
+
+    # Log if the AI created a new category that didn't exist before
+    all_known = _get_all_categories()
+    if result["category"] not in all_known:
+        log.info(f"[classifier] New category created: '{result['category']}'")
+
+    return result
+
+
+def _build_model(system_prompt: str) -> genai.GenerativeModel:
+    """
+    Return a model bound to the given system prompt.
+    The model is cached and rebuilt only when the prompt (i.e. the category
+    list) changes or its Gemini context cache is about to expire.
+    """
+    global _model_cache
+
+    _configure_client()
+
+    with _model_lock:
+        cached = _model_cache
+        if (cached is not None and cached[0] == system_prompt
+                and time.monotonic() < cached[2]):
+            return cached[1]
+
+        # A superseded context cache is left to expire via its TTL rather
+        # than deleted: requests already sent with the old model may still need it
+        model, expires_at, context_cache = _create_model(system_prompt)
+        _model_cache = (system_prompt, model, expires_at, context_cache)
+        return model
+
+
+def _create_model(system_prompt: str):
+    """
+    Build a model for `system_prompt`, preferably backed by an explicit
+    Gemini context cache so the prompt isn't billed again on every call.
+    Falls back to a plain model if caching is unavailable (e.g. the prompt
+    is below the model's minimum cacheable size).
+
+    Returns (model, monotonic expiry time, CachedContent or None).
+    """
+    version = hashlib.blake2b(system_prompt.encode("utf-8"), digest_size=8).hexdigest()
+    try:
+        context_cache = caching.CachedContent.create(
+            model=MODEL_NAME,
+            display_name=f"content-alchemist-{version}",
+            system_instruction=system_prompt,
+            ttl=datetime.timedelta(seconds=CONTEXT_CACHE_TTL),
+        )
+        model = genai.GenerativeModel.from_cached_content(cached_content=context_cache)
+        # Rebuild a little before the server drops the cache
+        return model, time.monotonic() + CONTEXT_CACHE_TTL - CONTEXT_CACHE_MARGIN, context_cache
+    except Exception as e:
+        log.info(f"[classifier] Context caching unavailable, sending full prompt: {e}")
+        model = genai.GenerativeModel(
+            model_name=MODEL_NAME,
+            system_instruction=system_prompt,
+        )
+        # Try caching again after a while in case the failure was transient
+        return model, time.monotonic() + CONTEXT_CACHE_TTL, None
+
+
+def _delete_context_cache(context_cache):
+    """Best-effort cleanup of a context cache we no longer need."""
+    if context_cache is None:
+        return
+    try:
+        context_cache.delete()
+    except Exception as e:
+        log.warning(f"[classifier] WARNING: Could not delete context cache: {e}")
+
+
+# Retry policy for rate limiting (HTTP 429): exponential backoff with jitter
+_retry_on_429 = retry(
+    retry=retry_if_exception_type(ResourceExhausted),
+    wait=wait_random_exponential(multiplier=RETRY_BASE_DELAY, max=RETRY_MAX_DELAY),
+    stop=stop_after_attempt(RETRY_ATTEMPTS),
+    reraise=True,
+)
+
+
+@_retry_on_429
+def _generate(model: genai.GenerativeModel, user_prompt: str,
+              config: dict = GENERATION_CONFIG) -> str:
+    """Send the prompt to Gemini and return the raw JSON reply text."""
+    return model.generate_content(user_prompt, generation_config=config).text
+
+
+@_retry_on_429
+async def _generate_async(model: genai.GenerativeModel, user_prompt: str,
+                          config: dict = GENERATION_CONFIG) -> str:
+    """Async twin of _generate()."""
+    response = await model.generate_content_async(user_prompt, generation_config=config)
+    return response.text
+
+
+def _failure_summary(e: Exception, raw: str) -> str:
+    """Log a failed classification and return the summary for its fallback."""
+    if isinstance(e, (orjson.JSONDecodeError, ValueError, KeyError)):
+        # Fallback: If AI fails or returns bad JSON, move to _unclassified
+        log.warning(f"[classifier] WARNING: Could not parse LLM response: {e}")
+        log.warning(f"[classifier] Raw response was: {raw}")
+        return "Could not classify this document."
+
+    # Fallback: API errors (network issues, etc.)
+    log.error(f"[classifier] ERROR: API call failed: {e}")
+    return "API error during classification."
+
+
+def _handle_failure(e: Exception, raw: str, original_filename: str) -> dict:
+    """Log a failed classification and return the matching fallback decision."""
+    return _fallback_result(_failure_summary(e, raw), original_filename)
+
+
+def _finish_batch(items: list[tuple[str, str]], keys: list[str], vectors: dict,
+                  results: list[Optional[dict]], misses: list[int],
+                  fresh: list[Optional[dict]], summary: str) -> list[dict]:
+    """
+    Merge freshly classified decisions into `results` and cache them.
+    Items without a usable decision fall back to _unclassified with `summary`.
+    """
+    for i, result in zip(misses, fresh):
+        original_filename = items[i][1]
+        if result is None:
+            results[i] = _fallback_result(summary, original_filename)
+            continue
+        cache.cache_result(keys[i], result)
+        semantic_index.add(vectors.get(i), original_filename, result)
+        results[i] = result
+    return results
+
+
+def classify_file(text: str, original_filename: str) -> dict:
+    """
+    The Main Intelligence Function.
+    Sends extracted text + original filename to Gemini Flash.
+
+    Steps:
+    1. Return the cached decision if this exact text (or a near-duplicate)
+       was seen before.
+    2. Prepare prompt with filename and text.
+    3. Call Gemini API (retrying on rate limits).
+    4. Clean and parse JSON response.
+    5. Validate and sanitize keys, then cache the decision.
+    6. Return decision to watcher.py.
+    """
     # Build prompt dynamically so it sees current folders on disk
     system_prompt = _build_system_prompt()
+    key = _cache_key(text, system_prompt)
+    cached = _cache_lookup(key, original_filename)
+    if cached is not None:
+        return cached
 
-    model = genai.GenerativeModel(
-        model_name=MODEL_NAME,
-        system_instruction=system_prompt,
-    )
+    model = _build_model(system_prompt)
 
+    # Second tier: reuse the decision of a near-duplicate document
+    vector = semantic_index.embed(text)
+    similar = semantic_index.lookup(vector, original_filename)
+    if similar is not None:
+        return _ensure_extension(similar, original_filename)
+
+    user_prompt = _build_user_prompt(text, original_filename)
+
+    raw = "N/A"
     try:
         # Send data to Google and wait for response
-        response = model.generate_content(user_prompt)
-        raw = response.text.strip()
+        raw = _generate(model, user_prompt)
+        result = _parse_response(raw, original_filename)
+    except Exception as e:
+        return _handle_failure(e, raw, original_filename)
 
-        # Defensive: strip possible markdown fences (```json ... ```)
-        if raw.startswith("```"):
-            raw = raw.split("\n", 1)[-1]
-        if raw.endswith("```"):
-            raw = raw.rsplit("```", 1)[0]
-        raw = raw.strip()
+    cache.cache_result(key, result)
+    semantic_index.add(vector, original_filename, result)
+    return result
 
-        # Parse the raw string into a Python dictionary
-        result = json.loads(raw)
 
-        # Validate required keys exist
-        for key in ("summary_sentence", "category", "suggested_filename"):
-            if key not in result:
-                raise ValueError(f"Missing key: {key}")
+async def classify_file_async(text: str, original_filename: str) -> dict:
+    """
+    Async version of classify_file() for the watcher's event loop.
+    Same prompt, parsing and fallbacks; the network wait doesn't block
+    other files from being classified.
+    """
+    system_prompt = _build_system_prompt()
+    key = _cache_key(text, system_prompt)
+    cached = _cache_lookup(key, original_filename)
+    if cached is not None:
+        return cached
 
-        # Ensure the extension is preserved in the new filename
-        if not result["suggested_filename"].endswith(ext):
-            result["suggested_filename"] += ext
+    # May create or refresh a context cache over the network: keep it off the loop
+    model = await asyncio.to_thread(_build_model, system_prompt)
 
-        # Sanitise the category name (remove headers/slashes to avoid bad paths)
-        result["category"] = result["category"].strip().replace("/", "-").replace("\\", "-")
+    vector = await asyncio.to_thread(semantic_index.embed, text)
+    similar = semantic_index.lookup(vector, original_filename)
+    if similar is not None:
+        return _ensure_extension(similar, original_filename)
 
-        # Log if the AI created a new category that didn't exist before
-        all_known = _get_all_categories()
-        if result["category"] not in all_known:
-            print(f"[classifier] New category created: '{result['category']}'")
+    user_prompt = _build_user_prompt(text, original_filename)
 
-        return result
+    raw = "N/A"
+    try:
+        raw = await _generate_async(model, user_prompt)
+        result = _parse_response(raw, original_filename)
+    except Exception as e:
+        return _handle_failure(e, raw, original_filename)
+
+    cache.cache_result(key, result)
+    semantic_index.add(vector, original_filename, result)
+    return result
 
-    except (json.JSONDecodeError, ValueError, KeyError) as e:
-        # Fallback: If AI fails or returns bad JSON, move to _unclassified
-        print(f"[classifier] WARNING: Could not parse LLM response: {e}")
-        print(f"[classifier] Raw response was: {raw if 'raw' in dir() else 'N/A'}")
-        return {
-            "summary_sentence": "Could not classify this document.",
-            "category": "_unclassified",
-            "suggested_filename": original_filename,
-        }
 
+def classify_batch(items: list[tuple[str, str]]) -> list[dict]:
+    """
+    Classify several (text, filename) items with a single Gemini request.
+    Meant for small groups of files that arrive together: one round trip
+    instead of one per file, with the same caches and fallbacks as
+    classify_file().
+
+    Returns one decision dict per item, in the same order as `items`.
+    """
+    if not items:
+        return []
+
+    system_prompt = _build_system_prompt()
+    keys, results, vectors = _lookup_many(items, system_prompt)
+    misses = [i for i, r in enumerate(results) if r is None]
+    if not misses:
+        return results
+
+    model = _build_model(system_prompt)
+    batch = [items[i] for i in misses]
+
+    raw = "N/A"
+    summary = "Could not classify this document."
+    try:
+        raw = _generate(model, _build_batch_prompt(batch), BATCH_GENERATION_CONFIG)
+        fresh = _parse_batch_response(raw, batch)
     except Exception as e:
-        # Fallback: API errors (network issues, etc.)
-        print(f"[classifier] ERROR: API call failed: {e}")
-        return {
-            "summary_sentence": "API error during classification.",
-            "category": "_unclassified",
-            "suggested_filename": original_filename,
-        }
+        summary, fresh = _failure_summary(e, raw), [None] * len(batch)
+
+    return _finish_batch(items, keys, vectors, results, misses, fresh, summary)
+
+
+async def classify_batch_async(items: list[tuple[str, str]]) -> list[dict]:
+    """Async version of classify_batch() for the watcher's event loop."""
+    if not items:
+        return []
+
+    system_prompt = _build_system_prompt()
+    keys, results, vectors = await asyncio.to_thread(_lookup_many, items, system_prompt)
+    misses = [i for i, r in enumerate(results) if r is None]
+    if not misses:
+        return results
+
+    model = await asyncio.to_thread(_build_model, system_prompt)
+    batch = [items[i] for i in misses]
+
+    raw = "N/A"
+    summary = "Could not classify this document."
+    try:
+        raw = await _generate_async(model, _build_batch_prompt(batch), BATCH_GENERATION_CONFIG)
+        fresh = _parse_batch_response(raw, batch)
+    except Exception as e:
+        summary, fresh = _failure_summary(e, raw), [None] * len(batch)
+
+    return _finish_batch(items, keys, vectors, results, misses, fresh, summary)
+
+
+def classify_files_batch(items: list[tuple[str, str]]) -> list[dict]:
+    """
+    Bulk version of classify_file() built on the Gemini Batch API.
+    Billed at half price, but results can take a while, so this is meant
+    for draining backlogs rather than single drops.
+
+    Steps:
+    1. Answer cached items (exact or near-duplicate) directly; write one
+       JSONL request line per miss.
+    2. Upload the JSONL and submit a batch job.
+    3. Poll until the job finishes.
+    4. Download the results and parse each line like classify_file().
+
+    Returns one decision dict per item, in the same order as `items`.
+    Items that fail fall back to _unclassified, exactly like classify_file().
+    """
+    if not items:
+        return []
+
+    system_prompt = _build_system_prompt()
+
+    # Step 1 — Serve cache hits, then build the JSONL for the misses in memory
+    # (keys are list indexes so duplicate filenames in one batch can't collide)
+    keys, results, vectors = _lookup_many(items, system_prompt)
+    misses = [i for i, r in enumerate(results) if r is None]
+    if not misses:
+        return results
+
+    client = _get_batch_client()
+    lines = []
+    for i in misses:
+        text, original_filename = items[i]
+        lines.append(orjson.dumps({
+            "key": str(i),
+            "request": {
+                "system_instruction": {"parts": [{"text": system_prompt}]},
+                "generation_config": GENERATION_CONFIG,
+                "contents": [{
+                    "role": "user",
+                    "parts": [{"text": _build_user_prompt(text, original_filename)}],
+                }],
+            },
+        }))
+    jsonl = io.BytesIO(b"\n".join(lines))
+
+    try:
+        # Step 2 — Upload and submit
+        uploaded = client.files.upload(
+            file=jsonl,
+            config={"display_name": "content-alchemist-batch", "mime_type": "jsonl"},
+        )
+        job = client.batches.create(model=MODEL_NAME, src=uploaded.name)
+        log.info(f"[classifier] Submitted batch job {job.name} ({len(misses)} files)")
+
+        # Step 3 — Poll until the job reaches a terminal state
+        while job.state.name not in BATCH_DONE_STATES:
+            time.sleep(BATCH_POLL_INTERVAL)
+            job = client.batches.get(name=job.name)
+
+        if job.state.name != "JOB_STATE_SUCCEEDED":
+            raise RuntimeError(f"Batch job ended in state {job.state.name}")
+
+        # Step 4 — Download the result JSONL
+        payload = client.files.download(file=job.dest.file_name)
+
+    except Exception as e:
+        # Fallback: the whole job failed, so every uncached file goes to _unclassified
+        log.error(f"[classifier] ERROR: Batch job failed: {e}")
+        return [
+            r if r is not None else _fallback_result("API error during classification.", name)
+            for r, (_, name) in zip(results, items)
+        ]
+
+    for line in payload.splitlines():
+        if not line.strip():
+            continue
+        try:
+            # A line we can't tie back to an item is skipped; that item then
+            # falls back below, like any other missing result
+            entry = orjson.loads(line)
+            i = int(entry["key"])
+            if not 0 <= i < len(items):
+                raise IndexError(f"key {i} out of range")
+            original_filename = items[i][1]
+        except (orjson.JSONDecodeError, ValueError, KeyError, IndexError, TypeError) as e:
+            log.warning(f"[classifier] WARNING: Skipping unreadable batch result line: {e}")
+            continue
+
+        try:
+            if "error" in entry:
+                raise RuntimeError(entry["error"])
+            raw = entry["response"]["candidates"][0]["content"]["parts"][0]["text"]
+            results[i] = _parse_response(raw, original_filename)
+            cache.cache_result(keys[i], results[i])
+            semantic_index.add(vectors[i], original_filename, results[i])
+        except (orjson.JSONDecodeError, ValueError, KeyError, IndexError, TypeError) as e:
+            log.warning(f"[classifier] WARNING: Could not parse batch result for '{original_filename}': {e}")
+            results[i] = _fallback_result("Could not classify this document.", original_filename)
+        except RuntimeError as e:
+            log.error(f"[classifier] ERROR: Batch request failed for '{original_filename}': {e}")
+            results[i] = _fallback_result("API error during classification.", original_filename)
+
+    # Any item missing from the result file is treated as an API error
+    return [
+        r if r is not None else _fallback_result("API error during classification.", name)
+        for r, (_, name) in zip(results, items)
+    ]
 
 
 # ── Quick CLI test ──────────────────────────────────────────────────
@@ -201,6 +917,9 @@ if __name__ == "__main__":
         print("Usage: python classifier.py <filepath>")
         sys.exit(1)
 
+    # Show the pipeline's [classifier] / [db] messages alongside the result
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     filepath = sys.argv[1]
     filename = os.path.basename(filepath)
 
@@ -211,4 +930,4 @@ if __name__ == "__main__":
     print(f"Classifying ({len(text.split())} words)...")
     result = classify_file(text, filename)
 
-    print(json.dumps(result, indent=2))
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
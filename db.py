@@ -1,15 +1,86 @@
 """
 db.py — Logger class using Python's sqlite3.
 Stores: original_filename, new_filename, summary, category, timestamp.
+Also holds the classification caches: exact (content hash → LLM decision)
+and semantic (embedding → LLM decision).
 Database file: content_alchemist.db (project root).
 """
 
 import os
+import orjson
+import logging
+import hashlib
+import time
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+# Maximum number of cached classifications kept; least recently used go first
+CACHE_MAX_ENTRIES = 5000
+# Maximum number of document embeddings kept for the semantic cache; oldest go first
+SEMANTIC_MAX_ENTRIES = 5000
+
+# Write-behind logging: the background writer commits up to this many
+# records per transaction, waiting at most this long to collect them
+WRITE_BEHIND_MAX = 50
+WRITE_BEHIND_INTERVAL = 0.5  # seconds
+
+# Bloom filter in front of the classification cache, so a key that was never
+# cached is rejected without a query: 64 KB of bits, 3 bit positions per key,
+# rebuilt from the table once more than half the bits are set
+BLOOM_BITS = 64 * 1024 * 8
+BLOOM_HASHES = 3
+BLOOM_MAX_FILL = 0.5
+
+log = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys.
+    `key in bloom` can be a false positive but never a false negative.
+    Keys can't be removed; rebuild the filter instead.
+    """
+
+    def __init__(self, nbits: int = BLOOM_BITS, nhashes: int = BLOOM_HASHES):
+        self.nbits = nbits
+        self.nhashes = nhashes
+        self.set_bits = 0
+        self._bits = bytearray(nbits // 8)
+
+    def _positions(self, key: str) -> list[int]:
+        """Bit positions for `key`: consecutive 4-byte slices of one blake2b digest."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4 * self.nhashes).digest()
+        return [
+            int.from_bytes(digest[i:i + 4], "little") % self.nbits
+            for i in range(0, len(digest), 4)
+        ]
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                self.set_bits += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def fill(self) -> float:
+        """Fraction of bits set; the false-positive rate grows with it."""
+        return self.set_bits / self.nbits
 
 
 class Logger:
-    """SQLite-backed logger for processed file records."""
+    """
+    SQLite-backed logger for processed file records.
+    Keeps one connection open for its whole lifetime; a lock makes it safe
+    to share between the watcher's threads.
+    """
 
     def __init__(self, db_path: str = None):
         if db_path is None:
@@ -18,17 +89,74 @@ class Logger:
                 "content_alchemist.db",
             )
         self.db_path = db_path
+        self._lock = threading.Lock()
+        # Autocommit mode: multi-statement writes use _transaction() explicitly
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None,
+        )
+        self._conn.row_factory = sqlite3.Row
+        # WAL lets the dashboard read while the watcher writes (persistent setting)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL: only the last commits can be lost on power failure
+        self._conn.execute("PRAGMA synchronous=NORMAL")
         self._init_db()
+        with self._lock:
+            self._rebuild_bloom()
+
+        # Write-behind queue for log_later(); the writer thread starts on first use
+        self._pending = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
 
     # ── Private ─────────────────────────────────────────────────────
 
-    def _connect(self):
-        """Return a connection to the SQLite database."""
-        return sqlite3.connect(self.db_path)
+    @contextmanager
+    def _transaction(self):
+        """Hold the lock and run the block as one BEGIN … COMMIT (ROLLBACK on error)."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _write_behind(self):
+        """Writer thread: drain queued records and commit them in groups."""
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + WRITE_BEHIND_INTERVAL
+            while len(batch) < WRITE_BEHIND_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self.log_many(batch)
+            except Exception as e:
+                log.error(f"[logger] ERROR: Could not save {len(batch)} records: {e}")
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+
+    def _rebuild_bloom(self):
+        """Refill the Bloom filter from the cache table. Caller holds the lock."""
+        bloom = BloomFilter()
+        for (key,) in self._conn.execute("SELECT hash FROM classification_cache"):
+            bloom.add(key)
+        self._bloom = bloom
+        # Changes whenever another connection commits; see get_cached()
+        (self._bloom_version,) = self._conn.execute("PRAGMA data_version").fetchone()
 
     def _init_db(self):
-        """Create the files table if it doesn't already exist."""
-        with self._connect() as conn:
+        """Create the tables, indexes and full-text index if they don't already exist."""
+        with self._lock:
+            conn = self._conn
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS files (
                     id                INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -40,15 +168,59 @@ class Logger:
                     timestamp         TEXT    DEFAULT (datetime('now', 'localtime'))
                 );
             """)
-            conn.commit()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS semantic_cache (
+                    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+                    original_filename TEXT NOT NULL,
+                    embedding         BLOB NOT NULL,
+                    result_json       TEXT NOT NULL
+                );
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS classification_cache (
+                    hash        TEXT PRIMARY KEY,
+                    result_json TEXT NOT NULL,
+                    ts          TEXT DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+                );
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_files_ts ON files(timestamp DESC)"
+            )
+
+            # Full-text index over summaries, kept in sync by triggers
+            fts_exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'files_fts'"
+            ).fetchone()
+            conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS files_fts
+                    USING fts5(summary, content='files', content_rowid='id');
+
+                CREATE TRIGGER IF NOT EXISTS files_fts_ai AFTER INSERT ON files BEGIN
+                    INSERT INTO files_fts(rowid, summary) VALUES (new.id, new.summary);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS files_fts_ad AFTER DELETE ON files BEGIN
+                    INSERT INTO files_fts(files_fts, rowid, summary)
+                        VALUES ('delete', old.id, old.summary);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS files_fts_au AFTER UPDATE ON files BEGIN
+                    INSERT INTO files_fts(files_fts, rowid, summary)
+                        VALUES ('delete', old.id, old.summary);
+                    INSERT INTO files_fts(rowid, summary) VALUES (new.id, new.summary);
+                END;
+            """)
+            if not fts_exists:
+                # Index rows logged before full-text search existed
+                conn.execute("INSERT INTO files_fts(files_fts) VALUES ('rebuild')")
 
     # ── Public API ──────────────────────────────────────────────────
 
     def log(self, original_filename: str, new_filename: str,
             category: str, summary: str, dest_path: str):
         """Insert a processed-file record."""
-        with self._connect() as conn:
-            conn.execute(
+        with self._lock:
+            self._conn.execute(
                 """
                 INSERT INTO files
                     (original_filename, new_filename, category, summary, dest_path)
@@ -56,14 +228,47 @@ class Logger:
                 """,
                 (original_filename, new_filename, category, summary, dest_path),
             )
-            conn.commit()
-        print(f"[logger] Saved record for '{new_filename}' in category '{category}'")
+        log.info(f"[logger] Saved record for '{new_filename}' in category '{category}'")
+
+    def log_many(self, records: list[tuple[str, str, str, str, str]]):
+        """
+        Insert many processed-file records in a single transaction.
+        Each record is (original_filename, new_filename, category, summary, dest_path).
+        """
+        if not records:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO files
+                    (original_filename, new_filename, category, summary, dest_path)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                records,
+            )
+        log.info(f"[logger] Saved {len(records)} records")
+
+    def log_later(self, original_filename: str, new_filename: str,
+                  category: str, summary: str, dest_path: str):
+        """
+        Queue a processed-file record and return immediately (write-behind).
+        A background thread commits queued records in groups; call flush()
+        before exiting to make sure everything is written.
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_behind, daemon=True)
+                self._writer.start()
+        self._pending.put((original_filename, new_filename, category, summary, dest_path))
+
+    def flush(self):
+        """Block until every record queued with log_later() has been written."""
+        self._pending.join()
 
     def get_recent(self, limit: int = 20) -> list[dict]:
         """Return the most recent `limit` records."""
-        with self._connect() as conn:
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute(
+        with self._lock:
+            rows = self._conn.execute(
                 "SELECT * FROM files ORDER BY timestamp DESC LIMIT ?",
                 (limit,),
             ).fetchall()
@@ -71,33 +276,160 @@ class Logger:
 
     def search_summary(self, query: str) -> list[dict]:
         """
-        Keyword search on the summary column.
-        Splits query into words and matches rows containing ALL words.
+        Keyword search on the summary column (FTS5 full-text index).
+        Splits query into words and matches rows containing ALL words;
+        each word also matches as a prefix ("bio" finds "biology").
         """
-        words = query.strip().split()
+        # Quote every word so FTS5 operators/punctuation in the query are literal
+        words = [w for w in query.strip().split() if any(c.isalnum() for c in w)]
         if not words:
             return []
 
-        conditions = " AND ".join(["summary LIKE ?"] * len(words))
-        params = [f"%{w}%" for w in words]
+        match = " AND ".join('"{}"*'.format(w.replace('"', '""')) for w in words)
 
-        with self._connect() as conn:
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute(
-                f"SELECT * FROM files WHERE {conditions} ORDER BY timestamp DESC",
-                params,
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT f.* FROM files_fts
+                JOIN files f ON f.id = files_fts.rowid
+                WHERE files_fts MATCH ?
+                ORDER BY f.timestamp DESC
+                """,
+                (match,),
             ).fetchall()
         return [dict(row) for row in rows]
 
+    def count(self) -> int:
+        """Return the number of logged records."""
+        with self._lock:
+            (n,) = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        return n
+
+    @contextmanager
+    def reader(self):
+        """
+        Yield the shared connection (under the lock) for callers that run
+        their own read-only queries, e.g. pandas.read_sql_query.
+        """
+        with self._lock:
+            yield self._conn
+
     def get_all(self) -> list[dict]:
         """Return all records, newest first."""
-        with self._connect() as conn:
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute(
+        with self._lock:
+            rows = self._conn.execute(
                 "SELECT * FROM files ORDER BY timestamp DESC"
             ).fetchall()
         return [dict(row) for row in rows]
 
+    # ── Classification cache ────────────────────────────────────────
+
+    def get_cached(self, key: str) -> Optional[dict]:
+        """
+        Return the cached classification for `key`, or None on a miss.
+        A hit refreshes the entry's timestamp so eviction stays LRU.
+        Keys the Bloom filter has never seen are a miss without a query.
+
+        The filter only sees keys cached through this Logger, so keys added
+        by another process (e.g. classifier.py run while the watcher is up)
+        would be missed forever. PRAGMA data_version tells us whether any
+        other connection has committed since the filter was built; if so,
+        it is rebuilt before the miss is trusted.
+        """
+        with self._lock:
+            if key not in self._bloom:
+                (version,) = self._conn.execute("PRAGMA data_version").fetchone()
+                if version == self._bloom_version:
+                    return None
+                self._rebuild_bloom()
+                if key not in self._bloom:
+                    return None
+            row = self._conn.execute(
+                "SELECT result_json FROM classification_cache WHERE hash = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE classification_cache "
+                "SET ts = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE hash = ?",
+                (key,),
+            )
+        return orjson.loads(row[0])
+
+    def cache_result(self, key: str, result: dict):
+        """Store a classification, evicting the oldest entries past CACHE_MAX_ENTRIES."""
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO classification_cache (hash, result_json)
+                VALUES (?, ?)
+                """,
+                (key, orjson.dumps(result).decode()),
+            )
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM classification_cache"
+            ).fetchone()
+            if count > CACHE_MAX_ENTRIES:
+                conn.execute(
+                    """
+                    DELETE FROM classification_cache WHERE hash IN (
+                        SELECT hash FROM classification_cache
+                        ORDER BY ts ASC LIMIT ?
+                    )
+                    """,
+                    (count - CACHE_MAX_ENTRIES,),
+                )
+
+            # Evicted keys stay set in the filter; start afresh once it's too full
+            self._bloom.add(key)
+            if self._bloom.fill > BLOOM_MAX_FILL:
+                self._rebuild_bloom()
+
+    def add_embedding(self, original_filename: str, embedding: bytes, result: dict):
+        """
+        Store a document embedding alongside the decision it produced,
+        evicting the oldest embeddings past SEMANTIC_MAX_ENTRIES.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO semantic_cache (original_filename, embedding, result_json)
+                VALUES (?, ?, ?)
+                """,
+                (original_filename, embedding, orjson.dumps(result).decode()),
+            )
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM semantic_cache"
+            ).fetchone()
+            if count > SEMANTIC_MAX_ENTRIES:
+                conn.execute(
+                    """
+                    DELETE FROM semantic_cache WHERE id IN (
+                        SELECT id FROM semantic_cache
+                        ORDER BY id ASC LIMIT ?
+                    )
+                    """,
+                    (count - SEMANTIC_MAX_ENTRIES,),
+                )
+
+    def get_embeddings(self) -> list[tuple[str, bytes, dict]]:
+        """
+        Return the newest SEMANTIC_MAX_ENTRIES (original_filename, embedding,
+        result) rows, oldest first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT original_filename, embedding, result_json FROM (
+                    SELECT id, original_filename, embedding, result_json
+                    FROM semantic_cache ORDER BY id DESC LIMIT ?
+                ) ORDER BY id
+                """,
+                (SEMANTIC_MAX_ENTRIES,),
+            ).fetchall()
+        return [(name, emb, orjson.loads(res)) for name, emb, res in rows]
+
 
 # ── Convenience singleton ───────────────────────────────────────────
 # Other modules can do:  from db import logger
@@ -11,7 +11,7 @@ Usage:
 
 import streamlit as st
 import pandas as pd
-from db import Logger
+from db import logger  # the process-wide Logger, shared across reruns and sessions
 
 # ── Page config ─────────────────────────────────────────────────────
 st.set_page_config(
@@ -20,7 +20,6 @@ st.set_page_config(
     layout="wide",
 )
 
-logger = Logger()
 
 # ── Header ──────────────────────────────────────────────────────────
 st.title("🧪 Content Alchemist")
@@ -38,14 +37,44 @@ DISPLAY_COLS = {
     "timestamp":         "Processed At",
 }
 
+# Reruns within this many seconds reuse the previous query results
+CACHE_TTL = 5
 
-def _show_table(records: list[dict]):
-    """Render a list of records as a pretty Streamlit dataframe."""
-    if not records:
+RECENT_SQL = (
+    f"SELECT {', '.join(DISPLAY_COLS)} FROM files "
+    "ORDER BY timestamp DESC LIMIT ?"
+)
+
+
+# ── Cached reads ────────────────────────────────────────────────────
+# Streamlit reruns this whole script on every interaction; these keep the
+# database from being queried again for each rerun.
+
+@st.cache_data(ttl=CACHE_TTL)
+def _recent(limit: int) -> pd.DataFrame:
+    """Most recent records, built straight into a DataFrame by pandas."""
+    with logger.reader() as conn:
+        return pd.read_sql_query(RECENT_SQL, conn, params=(limit,))
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def _count() -> int:
+    """Total number of logged files."""
+    return logger.count()
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def _search(query: str) -> pd.DataFrame:
+    """Full-text search results for `query`."""
+    return pd.DataFrame(logger.search_summary(query))
+
+
+def _show_table(df: pd.DataFrame):
+    """Render a DataFrame of records as a pretty Streamlit dataframe."""
+    if df.empty:
         st.info("No files found.")
         return
 
-    df = pd.DataFrame(records)
     cols = [c for c in DISPLAY_COLS if c in df.columns]
     df_display = df[cols].rename(columns=DISPLAY_COLS)
 
@@ -55,9 +84,8 @@ def _show_table(records: list[dict]):
 # ── Tab 1: Recent ──────────────────────────────────────────────────
 with tab_recent:
     st.subheader("Last 20 processed files")
-    recent = logger.get_recent(limit=20)
-    _show_table(recent)
-    st.caption(f"Total files in database: {len(logger.get_all())}")
+    _show_table(_recent(20))
+    st.caption(f"Total files in database: {_count()}")
 
 
 # ── Tab 2: Query ───────────────────────────────────────────────────
@@ -74,10 +102,10 @@ with tab_query:
             st.write(user_query)
 
         # Search and respond
-        results = logger.search_summary(user_query)
+        results = _search(user_query)
 
         with st.chat_message("assistant"):
-            if results:
+            if not results.empty:
                 st.write(f"Found **{len(results)}** matching file(s):")
                 _show_table(results)
             else:
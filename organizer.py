@@ -4,10 +4,17 @@ under organized_storage/.
 """
 
 import os
+import re
 import shutil
+import logging
 
 STORAGE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "organized_storage")
 
+# Folders bigger than this are probed instead of listed when picking a _N suffix
+SCAN_LIMIT = 10_000
+
+log = logging.getLogger(__name__)
+
 
 def move_file(src: str, category: str, new_name: str) -> str:
     """
@@ -23,23 +30,100 @@ def move_file(src: str, category: str, new_name: str) -> str:
     dest = os.path.join(category_dir, new_name)
     dest = _handle_duplicate(dest)
 
-    shutil.move(src, dest)
-    print(f"[organizer] Moved → {dest}")
+    try:
+        # Replaces the empty placeholder reserved by _handle_duplicate
+        if os.stat(src).st_dev == os.stat(category_dir).st_dev:
+            # Same filesystem: one atomic rename, the file's data is never copied
+            os.replace(src, dest)
+        else:
+            # Across drives a rename is impossible; shutil copies then deletes
+            shutil.move(src, dest)
+    except Exception:
+        # Release the reserved name so it isn't burned by a failed move
+        try:
+            os.remove(dest)
+        except OSError:
+            pass
+        raise
+    log.info(f"[organizer] Moved → {dest}")
     return dest
 
 
 def _handle_duplicate(dest: str) -> str:
     """
-    If `dest` already exists, append _1, _2, … before the extension
-    until a free name is found.
+    Reserve a free name for `dest` and return it.
+    If `dest` already exists, append _1, _2, … before the extension,
+    continuing after the highest suffix already in use.
+
+    Each candidate is claimed by creating an empty placeholder with
+    O_CREAT | O_EXCL, so checking and claiming is one atomic syscall and two
+    files landing at once can never pick the same name.
     """
-    if not os.path.exists(dest):
+    # Fast path: the name is free
+    if _claim(dest):
         return dest
 
     base, ext = os.path.splitext(dest)
-    counter = 1
+    counter = _next_counter(dest)
     while True:
         candidate = f"{base}_{counter}{ext}"
-        if not os.path.exists(candidate):
+        if _claim(candidate):
             return candidate
         counter += 1
+
+
+def _claim(path: str) -> bool:
+    """Atomically create an empty placeholder at `path`; False if it already exists."""
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.close(fd)
+    return True
+
+
+def _next_counter(dest: str) -> int:
+    """
+    Return one past the highest _N suffix used for `dest` in its folder,
+    found with a single directory scan instead of one stat per number.
+    Folders with more than SCAN_LIMIT entries fall back to _probe_counter().
+    """
+    directory, name = os.path.split(dest)
+    stem, ext = os.path.splitext(name)
+    pattern = re.compile(re.escape(stem) + r"_(\d+)" + re.escape(ext))
+
+    highest = 0
+    with os.scandir(directory) as entries:
+        for seen, entry in enumerate(entries):
+            if seen >= SCAN_LIMIT:
+                return _probe_counter(dest)
+            match = pattern.fullmatch(entry.name)
+            if match:
+                highest = max(highest, int(match.group(1)))
+    return highest + 1
+
+
+def _probe_counter(dest: str) -> int:
+    """
+    Find a free _N suffix in O(log N) stat calls: probe _1, _2, _4, _8, …
+    until one is free, then binary-search between the last taken and the
+    first free number. Assumes suffixes are mostly contiguous; any gap it
+    lands on is still a free name.
+    """
+    base, ext = os.path.splitext(dest)
+
+    def taken(n: int) -> bool:
+        return os.path.exists(f"{base}_{n}{ext}")
+
+    hi = 1
+    while taken(hi):
+        hi *= 2
+    lo = hi // 2  # taken (or 0), while hi is free
+
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if taken(mid):
+            lo = mid
+        else:
+            hi = mid
+    return hi
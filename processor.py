@@ -1,14 +1,38 @@
 """
 processor.py — Text extraction from PDF and TXT files.
-Supports PyPDF2 for PDFs and plain read for .txt files.
-Returns up to the first 3,000 words of content.
+Supports pypdfium2 for PDFs and plain read for .txt files.
+Returns up to the first 3,000 words of content, or a shorter preview
+(extract_text_preview) that is enough for classification.
 """
 
 import os
-from PyPDF2 import PdfReader
+import codecs
+import threading
+from typing import Optional
+import pypdfium2 as pdfium
 
 # Limit the amount of text we send to the LLM to save tokens/cost
 MAX_WORDS = 3000
+# PDF pages are read only until roughly this many words are collected.
+# The count is a cheap approximation (spaces + 1), so leave some slack;
+# extract_text() trims the exact tail afterwards.
+PDF_WORD_BUDGET = int(MAX_WORDS * 1.2)
+# extract_text_preview() defaults: the classifier only needs the opening text.
+# Keep PREVIEW_MAX_CHARS at or below classifier.SAMPLE_THRESHOLD, so the
+# classifier sends a preview whole instead of re-sampling (and discarding) it.
+PREVIEW_MAX_CHARS = 8000
+PREVIEW_MAX_PAGES = 5
+
+# File types extract_text() can read; callers can reject anything else
+# without opening the file
+SUPPORTED_EXTS = {".pdf", ".txt"}
+# Every PDF starts with this signature, possibly after up to 1 KB of junk
+PDF_MAGIC = b"%PDF-"
+PDF_HEADER_SEARCH = 1024
+
+# PDFium is not thread-safe, not even across different documents, so only
+# one thread per process may be inside it at a time
+_PDFIUM_LOCK = threading.Lock()
 
 class UnsupportedFileTypeError(Exception):
     """Raised when the file extension is not supported."""
@@ -24,24 +48,17 @@ def extract_text(filepath: str) -> str:
 
     Raises:
         FileNotFoundError: If the file doesn't exist.
-        UnsupportedFileTypeError: If the extension is not .pdf or .txt.
+        UnsupportedFileTypeError: If the extension is not .pdf or .txt,
+            or a .pdf file isn't actually a PDF.
     """
-    # 1. Check if file exists
-    if not os.path.isfile(filepath):
-        raise FileNotFoundError(f"File not found: {filepath}")
-
-    # 2. Check extension
-    ext = os.path.splitext(filepath)[1].lower()
+    # 1 & 2. Check the file exists and has a type we can read
+    ext = _check_file(filepath)
 
     # 3. Route to the correct specialist function
     if ext == ".pdf":
         raw = _extract_pdf(filepath)
-    elif ext == ".txt":
-        raw = _extract_txt(filepath)
     else:
-        raise UnsupportedFileTypeError(
-            f"Unsupported file type '{ext}'. Only .pdf and .txt are supported."
-        )
+        raw = _extract_txt(filepath)
 
     # 4. Truncate text (optimization step)
     # Split into words, take first 3000, join back into string
@@ -49,45 +66,152 @@ def extract_text(filepath: str) -> str:
     return " ".join(words[:MAX_WORDS])
 
 
-def _extract_pdf(filepath: str) -> str:
+def extract_text_preview(filepath: str, max_chars: int = PREVIEW_MAX_CHARS,
+                         max_pages: int = PREVIEW_MAX_PAGES) -> str:
+    """
+    A cheaper extract_text() for classification.
+    Reads at most `max_pages` PDF pages and stops once `max_chars` characters
+    are collected; large .txt files are only read as far as needed.
+    Falls back to extract_text() if a PDF's first pages have no text
+    (e.g. a scanned cover).
+
+    Raises the same errors as extract_text().
+    """
+    ext = _check_file(filepath)
+    if ext == ".pdf":
+        raw = _extract_pdf(filepath, max_pages=max_pages, max_chars=max_chars)
+    else:
+        raw = _extract_txt(filepath, max_chars=max_chars)
+
+    text = " ".join(raw.split()[:MAX_WORDS])[:max_chars]
+    if not text and ext == ".pdf":
+        return extract_text(filepath)
+    return text
+
+
+def _check_file(filepath: str) -> str:
+    """
+    Make sure `filepath` is something we can read and return its extension.
+
+    Raises:
+        FileNotFoundError / UnsupportedFileTypeError: As for extract_text().
+    """
+    if not os.path.isfile(filepath):
+        raise FileNotFoundError(f"File not found: {filepath}")
+
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext not in SUPPORTED_EXTS:
+        raise UnsupportedFileTypeError(
+            f"Unsupported file type '{ext}'. Only .pdf and .txt are supported."
+        )
+    if ext == ".pdf" and not _has_pdf_header(filepath):
+        raise UnsupportedFileTypeError(
+            f"'{os.path.basename(filepath)}' has a .pdf extension but is not a PDF."
+        )
+    return ext
+
+
+def _has_pdf_header(filepath: str) -> bool:
+    """
+    Cheap check of the first bytes before handing a file to PDFium.
+    Empty files pass, so they end up on the usual 'no text' path.
+    """
+    with open(filepath, "rb") as f:
+        head = f.read(PDF_HEADER_SEARCH)
+    return not head or PDF_MAGIC in head
+
+
+def _extract_pdf(filepath: str, max_pages: Optional[int] = None,
+                 max_chars: Optional[int] = None) -> str:
     """
     The PDF Specialist.
-    Read all pages of a PDF using PyPDF2 and return concatenated text.
+    Read pages of a PDF using pypdfium2 (Google's PDFium C++ engine) and
+    return concatenated text, stopping once PDF_WORD_BUDGET words (or
+    `max_chars` characters, or `max_pages` pages) are collected
+    (long PDFs only need their first few pages).
     Handles corrupt / empty PDFs gracefully.
+    Safe to call from several threads: PDFium calls are serialised.
     """
+    with _PDFIUM_LOCK:
+        return _read_pdf(filepath, max_pages, max_chars)
+
+
+def _read_pdf(filepath: str, max_pages: Optional[int], max_chars: Optional[int]) -> str:
+    """Body of _extract_pdf(). Caller holds _PDFIUM_LOCK."""
     try:
-        reader = PdfReader(filepath)
+        pdf = pdfium.PdfDocument(filepath)
     except Exception as e:
         print(f"[processor] WARNING: Could not read PDF '{filepath}': {e}")
         return ""
 
     pages_text = []
-    # Loop through every page
-    for page in reader.pages:
-        try:
-            text = page.extract_text()
-            if text:
-                pages_text.append(text)
-        except Exception as e:
-            # If a single page is corrupt, skip it but keep going
-            print(f"[processor] WARNING: Skipping a page in '{filepath}': {e}")
+    word_count = 0
+    char_count = 0
+    pages = len(pdf) if max_pages is None else min(len(pdf), max_pages)
+    try:
+        # Loop through pages until we have enough text
+        for i in range(pages):
+            try:
+                page = pdf[i]
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                page.close()
+                if text:
+                    pages_text.append(text)
+                    word_count += text.count(" ") + 1
+                    char_count += len(text)
+            except Exception as e:
+                # If a single page is corrupt, skip it but keep going
+                print(f"[processor] WARNING: Skipping a page in '{filepath}': {e}")
+
+            if word_count >= PDF_WORD_BUDGET:
+                break
+            if max_chars is not None and char_count >= max_chars:
+                break
+    finally:
+        pdf.close()
 
     return "\n".join(pages_text)
 
 
-def _extract_txt(filepath: str) -> str:
+def _open_for_extract(filepath: str, length: int = 0):
+    """
+    Open a file that is about to be read once from start to end (or its
+    first `length` bytes; 0 means the whole file). Where the OS supports it,
+    tell the kernel so: read ahead aggressively (SEQUENTIAL) and start
+    loading that range right away (WILLNEED).
+    """
+    fd = os.open(filepath, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, length, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, length, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass  # only a hint; some filesystems don't support it
+    return os.fdopen(fd, "rb")
+
+
+def _extract_txt(filepath: str, max_chars: Optional[int] = None) -> str:
     """
     The Text File Specialist.
-    Read a plain-text file with UTF-8 encoding.
+    Read a plain-text file in one go and decode it as UTF-8.
+    With `max_chars`, only the bytes that can hold that many characters are read.
     """
+    if max_chars is None:
+        with _open_for_extract(filepath) as f:
+            data = f.read()
+    else:
+        limit = max_chars * 4  # a UTF-8 character is at most 4 bytes
+        with _open_for_extract(filepath, limit) as f:
+            data = f.read(limit)
     try:
-        # Try standard web encoding first
-        with open(filepath, "r", encoding="utf-8") as f:
-            return f.read()
+        # Try standard web encoding first; a character cut off at the
+        # read limit is simply dropped
+        return codecs.getincrementaldecoder("utf-8")().decode(data, final=max_chars is None)
     except UnicodeDecodeError:
         # Fallback to latin-1 which never fails (robustness)
-        with open(filepath, "r", encoding="latin-1") as f:
-            return f.read()
+        return data.decode("latin-1")
 
 
 # ── Quick CLI test ──────────────────────────────────────────────────
@@ -0,0 +1,172 @@
+"""
+semantic_cache.py — Second cache tier for classifier.py.
+
+Embeds the start of each document with Gemini and reuses the decision of a
+previously classified near-duplicate (e.g. the same paper with OCR noise),
+so it skips the much more expensive classification call.
+
+Vectors are persisted in the `semantic_cache` SQLite table and kept in memory
+as one float32 matrix, so a lookup is a single matrix-vector product. Both
+hold at most SEMANTIC_MAX_ENTRIES documents; the oldest are dropped first.
+"""
+
+import os
+import re
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+import google.generativeai as genai
+
+# Local modules
+from db import logger as store, SEMANTIC_MAX_ENTRIES
+
+# ── Configuration ───────────────────────────────────────────────────
+EMBED_MODEL = "models/gemini-embedding-001"
+EMBED_DIM = 768               # truncated output size (Matryoshka embedding)
+EMBED_WORDS = 512             # only the start of the document is embedded
+EMBED_BATCH_LIMIT = 100       # max texts per batchEmbedContents request
+SIMILARITY_THRESHOLD = 0.92   # cosine similarity needed to reuse a decision
+
+log = logging.getLogger(__name__)
+
+# Four-digit years in filenames (1900–2099)
+_YEAR_RE = re.compile(r"(?<!\d)(?:19|20)\d{2}(?!\d)")
+
+
+def _compatible(cached_name: str, original_filename: str) -> bool:
+    """
+    Post-filter for near-duplicate hits: embeddings can't tell two editions
+    apart, so reject a match when the file extension differs or both
+    filenames carry years that don't overlap.
+    """
+    if (os.path.splitext(cached_name)[1].lower()
+            != os.path.splitext(original_filename)[1].lower()):
+        return False
+
+    cached_years = set(_YEAR_RE.findall(cached_name))
+    new_years = set(_YEAR_RE.findall(original_filename))
+    if cached_years and new_years and cached_years.isdisjoint(new_years):
+        return False
+
+    return True
+
+
+class SemanticCache:
+    """In-memory cosine-similarity index over previously classified documents."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matrix = None   # (capacity, EMBED_DIM) float32, rows L2-normalised
+        self._size = 0        # number of filled rows in _matrix
+        self._entries = []    # parallel list of (original_filename, result)
+        self._oldest = 0      # row overwritten next once the matrix is full
+
+    # ── Private ─────────────────────────────────────────────────────
+
+    def _load(self):
+        """Read stored vectors from SQLite on first use. Caller holds the lock."""
+        if self._matrix is not None:
+            return
+        rows = store.get_embeddings()
+        capacity = min(max(len(rows), 64), SEMANTIC_MAX_ENTRIES)
+        self._matrix = np.zeros((capacity, EMBED_DIM), dtype=np.float32)
+        for name, emb, result in rows:
+            self._append(np.frombuffer(emb, dtype=np.float32), name, result)
+
+    def _append(self, vector: np.ndarray, original_filename: str, result: dict):
+        """
+        Add one row, doubling the matrix when it is full. Once it holds
+        SEMANTIC_MAX_ENTRIES rows, the oldest row is overwritten instead
+        (rows are reused in order, like a ring buffer). Caller holds the lock.
+        """
+        if self._size == SEMANTIC_MAX_ENTRIES:
+            row = self._oldest
+            self._oldest = (row + 1) % SEMANTIC_MAX_ENTRIES
+            self._matrix[row] = vector
+            self._entries[row] = (original_filename, result)
+            return
+
+        if self._size == len(self._matrix):
+            capacity = min(len(self._matrix) * 2, SEMANTIC_MAX_ENTRIES)
+            grown = np.zeros((capacity, EMBED_DIM), dtype=np.float32)
+            grown[:self._size] = self._matrix
+            self._matrix = grown
+        self._matrix[self._size] = vector
+        self._entries.append((original_filename, result))
+        self._size += 1
+
+    # ── Public API ──────────────────────────────────────────────────
+
+    def embed_many(self, texts: list[str]) -> list[Optional[np.ndarray]]:
+        """
+        Embed the first EMBED_WORDS words of each text (batched requests).
+        Returns L2-normalised float32 vectors, or None for every text if the
+        embedding call fails — the caller then just skips this cache tier.
+        """
+        snippets = [" ".join(t.split()[:EMBED_WORDS]) for t in texts]
+        vectors = []
+        try:
+            for start in range(0, len(snippets), EMBED_BATCH_LIMIT):
+                response = genai.embed_content(
+                    model=EMBED_MODEL,
+                    content=snippets[start:start + EMBED_BATCH_LIMIT],
+                    task_type="semantic_similarity",
+                    output_dimensionality=EMBED_DIM,
+                )
+                vectors.extend(response["embedding"])
+        except Exception as e:
+            log.warning(f"[semantic] WARNING: Embedding failed, skipping semantic cache: {e}")
+            return [None] * len(texts)
+
+        out = []
+        for v in vectors:
+            v = np.asarray(v, dtype=np.float32)
+            out.append(v / (np.linalg.norm(v) or 1.0))
+        return out
+
+    def embed(self, text: str) -> Optional[np.ndarray]:
+        """Single-text convenience wrapper around embed_many()."""
+        return self.embed_many([text])[0]
+
+    def lookup(self, vector: Optional[np.ndarray], original_filename: str) -> Optional[dict]:
+        """
+        Return the decision of the most similar compatible document whose
+        cosine similarity is above SIMILARITY_THRESHOLD, or None.
+        """
+        if vector is None:
+            return None
+
+        with self._lock:
+            self._load()
+            if self._size == 0:
+                return None
+            scores = self._matrix[:self._size] @ vector
+            entries = list(self._entries)
+
+        # Best match first; stop as soon as we drop below the threshold
+        for i in np.argsort(scores)[::-1]:
+            if scores[i] < SIMILARITY_THRESHOLD:
+                break
+            cached_name, result = entries[i]
+            if _compatible(cached_name, original_filename):
+                log.info(f"[semantic] Near-duplicate of '{cached_name}' "
+                         f"(similarity {scores[i]:.3f})")
+                return dict(result)
+
+        return None
+
+    def add(self, vector: Optional[np.ndarray], original_filename: str, result: dict):
+        """Remember a fresh decision (persisted to SQLite and kept in memory)."""
+        if vector is None:
+            return
+        with self._lock:
+            self._load()
+            self._append(vector, original_filename, result)
+        store.add_embedding(original_filename, vector.tobytes(), result)
+
+
+# ── Convenience singleton ───────────────────────────────────────────
+# Other modules can do:  from semantic_cache import index
+index = SemanticCache()
@@ -1,33 +1,88 @@
 """
 test_pipeline.py — Quick end-to-end test.
-Runs processor.extract_text → classifier.classify_file on a sample file
-and prints the JSON result.
+Runs processor.extract_text → classifier.classify_file on every sample
+file in a directory (or on a single file) and prints the JSON results.
+
+Text is extracted one file at a time (PDFium must not be called from
+several threads at once); the classification calls then run on a thread
+pool, since that time is spent waiting on the API rather than in Python.
 
 Usage:
-    python test_pipeline.py
+    python test_pipeline.py                  # tests/sample_files/
+    python test_pipeline.py path/to/folder   # every PDF/TXT in a folder
+    python test_pipeline.py path/to/file.pdf # a single file
 """
 
-import json
+import orjson
 import os
-from processor import extract_text
+import sys
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from processor import extract_text, SUPPORTED_EXTS
 from classifier import classify_file
 
-TEST_FILE = os.path.join(
-    os.path.dirname(__file__), "tests", "sample_files", "test_paper.txt"
-)
+TEST_DIR = os.path.join(os.path.dirname(__file__), "tests", "sample_files")
+
+# Files classified at the same time (keeps us under the API's rate limit)
+MAX_WORKERS = 8
 
-if __name__ == "__main__":
-    print(f"📄 Test file: {TEST_FILE}\n")
 
-    # Step 1 — Extract text
-    text = extract_text(TEST_FILE)
-    print(f"Extracted {len(text.split())} words.\n")
+def _collect(target: str) -> list[str]:
+    """Return the sample files to run: `target` itself, or the PDFs/TXTs inside it."""
+    if os.path.isfile(target):
+        return [target]
+    return sorted(
+        os.path.join(target, name) for name in os.listdir(target)
+        if os.path.splitext(name)[1].lower() in SUPPORTED_EXTS
+    )
 
-    # Step 2 — Classify via LLM
-    result = classify_file(text, os.path.basename(TEST_FILE))
 
-    # Step 3 — Print the JSON result
+def _extract(path: str):
+    """Extract a single file's text; returns the exception instead of raising."""
+    try:
+        return extract_text(path)
+    except Exception as e:
+        return e
+
+
+def _header(path: str):
+    """Print the banner above one file's result."""
     print("─" * 50)
-    print("CLASSIFICATION RESULT:")
+    print(f"CLASSIFICATION RESULT: {os.path.basename(path)}")
     print("─" * 50)
-    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    target = sys.argv[1] if len(sys.argv) > 1 else TEST_DIR
+    paths = _collect(target)
+    print(f"📄 Testing {len(paths)} file(s) from: {target}\n")
+
+    # Step 1 — Extract text, one file at a time
+    texts = {p: _extract(p) for p in paths}
+
+    # Step 2 — Classify via LLM, several files at once
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        futures = {
+            ex.submit(classify_file, text, os.path.basename(p)): p
+            for p, text in texts.items() if not isinstance(text, Exception)
+        }
+
+        # Files that couldn't be read are reported first
+        for path, text in texts.items():
+            if isinstance(text, Exception):
+                _header(path)
+                print(f"ERROR: {text}\n")
+
+        # Step 3 — Print each JSON result as soon as it's ready
+        for future in as_completed(futures):
+            path = futures[future]
+            _header(path)
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"ERROR: {e}\n")
+                continue
+            print(f"Extracted {len(texts[path].split())} words.")
+            print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
+            print()
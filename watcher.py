@@ -8,106 +8,612 @@ Usage:
 """
 
 import os # Used for folder paths and finding the current directory.
+import re # Used to match ignored file names.
 import time # Used to pause the program for a short time.
 import sys # Used to exit the program.
+import signal # Used to catch Ctrl+C.
+import asyncio # Used to classify several files at the same time.
+import threading # Used to run the pipeline and batch queue in the background.
+import queue # Used to schedule checks on files that are still being written.
+import logging # Used to print progress without blocking the pipeline.
+import logging.handlers
+from collections import OrderedDict # Used to remember recently seen files.
+from fnmatch import translate # Used to turn IGNORE_PATTERNS into one regex.
+from concurrent.futures import ProcessPoolExecutor # Used to extract text on several CPU cores.
 from watchdog.observers import Observer # Used to watch for changes in the file system.
-from watchdog.events import FileSystemEventHandler # Used to handle events in the file system.
+from watchdog.events import PatternMatchingEventHandler # Used to handle events in the file system.
 
 # Local modules
-from classifier import classify_file # Used to classify files.
-from organizer import move_file # Used to move files.
-from db import Logger # Used to log files.
-from processor import extract_text, UnsupportedFileTypeError # Used to extract text from files.
+# Only processor is imported here. The extraction processes re-import this
+# file on platforms that spawn them (Windows, macOS), and they need nothing
+# else; classifier, organizer and db (whose Logger opens the database and
+# rebuilds the Bloom filter) are imported by the functions that use them.
+from processor import extract_text_preview, UnsupportedFileTypeError, SUPPORTED_EXTS # Used to extract text from files.
 
 # ── Configuration ───────────────────────────────────────────────────
 # Define the folder to watch relative to this script
 DROP_ZONE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "input_drop_zone")
 # If you want to watch a completely different folder (like one on your Desktop), you can just replace that whole line with the direct path:
 # DROP_ZONE = "/Users/atharvamandhaniya/Desktop/My_New_Watch_Folder"
-# Time to wait (in seconds) for a file copy to finish before processing
-SETTLE_DELAY = 1  # seconds to wait for the file write to finish
+# Subfolders of the drop zone are only watched when WATCHER_RECURSIVE=1
+# (every watched folder costs an OS watch handle)
+RECURSIVE = os.getenv("WATCHER_RECURSIVE", "0") == "1"
+# Hidden system files (.DS_Store), editor lock files and temporary files
+IGNORE_PATTERNS = [".*", "~*", "*.tmp"]
+# Repeated created events for the same file (same path and modification time)
+# within DEDUP_WINDOW seconds are ignored; the last DEDUP_SIZE files are remembered
+DEDUP_SIZE = 1024
+DEDUP_WINDOW = 5  # seconds
+# A new file is processed once it has finished writing: its size is checked
+# every STABLE_INTERVAL seconds and must stay the same for STABLE_ROUNDS checks
+# in a row. Files still changing after STABLE_TIMEOUT seconds are processed anyway.
+STABLE_INTERVAL = 0.05  # seconds
+STABLE_ROUNDS = 3
+STABLE_TIMEOUT = 30     # seconds
+# Pipeline concurrency: WORKERS files move through the pipeline at once
+# (override with the WATCHER_CONCURRENCY environment variable), and at most
+# MAX_CONCURRENT_CALLS of them talk to Gemini at the same moment.
+WORKERS = int(os.getenv("WATCHER_CONCURRENCY", "4"))
+MAX_CONCURRENT_CALLS = 5
+# Files that reach the classifier together share one request: the collector
+# waits MINI_BATCH_WINDOW_MS after the first file (or until MINI_BATCH_SIZE
+# are waiting). Only WORKERS files can be waiting at once, so no point asking for more.
+MINI_BATCH_SIZE = WORKERS
+MINI_BATCH_WINDOW_MS = 200
+# Text extraction runs in this many separate processes (every core but one by
+# default; override with the WATCHER_EXTRACT_WORKERS environment variable)
+EXTRACT_WORKERS = int(os.getenv("WATCHER_EXTRACT_WORKERS", "0")) or max(2, (os.cpu_count() or 1) - 1)
+# .txt files smaller than this are read in a thread instead (not worth a process hop)
+INLINE_EXTRACT_MAX_BYTES = 64 * 1024
+# When BATCH_SIZE or more files are waiting (e.g. a big folder was dropped),
+# the backlog goes through the Gemini Batch API instead (half price). That
+# queue is flushed once BATCH_SIZE files are waiting, or BATCH_WINDOW seconds
+# after the first file arrived, whichever comes first.
+BATCH_SIZE = 10
+BATCH_WINDOW = 60  # seconds
+# Documents with less text than this skip the LLM: a keyword match decides,
+# otherwise they go to _unclassified/
+MIN_CLASSIFY_CHARS = 200
+# The main thread sleeps until Ctrl+C. Windows only runs Python signal
+# handlers between waits, so there it wakes up once a second to check.
+STOP_POLL = 1 if os.name == "nt" else None  # seconds
 
-# Initialize the database logger
-logger = Logger()
+# Built once at import instead of on every file (case-insensitive, like watchdog)
+_IGNORE_RE = re.compile(
+    "|".join(translate(pattern) for pattern in IGNORE_PATTERNS), re.IGNORECASE,
+)
+_SEP = "=" * 60
 
+# Console output goes through a queue: pipeline threads only enqueue log
+# records, and a background listener (started by start_watcher) prints them.
+# start_watcher puts the queue on the root logger, so the classifier, db,
+# organizer and semantic cache messages come out in the same order too.
+# Only these loggers are raised to INFO; third-party libraries (e.g. httpx,
+# which logs every HTTP request) still only show warnings.
+_PROJECT_LOGGERS = ["watcher", "classifier", "db", "organizer", "semantic_cache"]
+_log_queue = queue.Queue()
+_log_handler = logging.handlers.QueueHandler(_log_queue)
+log = logging.getLogger("watcher")
+_console = logging.StreamHandler(sys.stdout)
+_console.setFormatter(logging.Formatter("%(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _console)
 
-class FileHandler(FileSystemEventHandler):
+
+class FileHandler(PatternMatchingEventHandler):
     """
     React to new files landing in the drop zone.
     This class defines what happens when a new file is detected.
+    Folders and IGNORE_PATTERNS matches are filtered out by watchdog's
+    dispatcher before on_created() is called.
     """
 
-    def on_created(self, event):
-        """
-        Triggered automatically when a file is created.
-        Serves as the 'Security Guard' filtering valid files.
-        """
-        # 1. Ignore if it's a folder, not a file
-        if event.is_directory:
-            return
+    def __init__(self, settler: "Settler"):
+        super().__init__(ignore_patterns=IGNORE_PATTERNS, ignore_directories=True)
+        self.settler = settler
+        # (real path, mtime in ns) -> when it was last seen; oldest first (LRU)
+        self._recent = OrderedDict()
 
+    def on_created(self, event):
+        """Triggered automatically when a (non-ignored) file is created."""
         filepath = event.src_path
         filename = os.path.basename(filepath)
 
-        # 2. Ignore hidden system files (.DS_Store) and temporary files
-        if (filename.startswith(".") or filename.startswith("~")
-                or filename.endswith(".tmp")):
-            return
+        # Ignore duplicate events for a file we've just queued
+        try:
+            key = (os.path.realpath(filepath), os.stat(filepath).st_mtime_ns)
+        except FileNotFoundError:
+            return  # already gone (e.g. a temp file that was renamed)
+        except OSError:
+            # Can't stat it (e.g. PermissionError): skip the duplicate check
+            # rather than let the error stop watchdog's observer thread
+            key = None
+        if key is not None:
+            now = time.monotonic()
+            seen = self._recent.get(key)
+            if seen is not None and now - seen < DEDUP_WINDOW:
+                return
+            self._recent[key] = now
+            self._recent.move_to_end(key)
+            if len(self._recent) > DEDUP_SIZE:
+                self._recent.popitem(last=False)
 
         # Visual separator for the terminal
-        print(f"\n{'='*60}")
-        print(f"[watcher] New file detected: {filename}")
-        print(f"{'='*60}")
+        log.info(f"\n{_SEP}\n[watcher] New file detected: {filename}\n{_SEP}")
+
+        # Let the file finish writing, then hand it to the pipeline
+        # (returns immediately; the waiting happens on the Settler thread)
+        self.settler.add(filepath)
+
+
+class Settler:
+    """
+    Holds newly detected files until they've finished writing, without
+    blocking the watchdog thread. Each file is polled every STABLE_INTERVAL
+    seconds and released to the pipeline once its size has stayed the same
+    for STABLE_ROUNDS checks in a row (or after STABLE_TIMEOUT regardless).
+    Small files that land in one go are released within ~0.2s.
+    Repeated events for the same path (e.g. create + modify) just restart
+    its polling instead of queueing it twice.
+    """
+
+    def __init__(self, pipeline: "Pipeline"):
+        self.pipeline = pipeline
+        self._heap = queue.PriorityQueue()  # (next check time, filepath)
+        self._state = {}                    # filepath -> [next check, last size, stable rounds, deadline]
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start the background thread."""
+        self._thread.start()
 
-        # 3. Wait for the file to finish writing (prevents reading empty files)
-        time.sleep(SETTLE_DELAY)
+    def add(self, filepath: str):
+        """Queue (or restart polling for) a path; thread-safe."""
+        now = time.monotonic()
+        due = now + STABLE_INTERVAL
+        with self._lock:
+            self._state[filepath] = [due, None, 0, now + STABLE_TIMEOUT]
+        self._heap.put((due, filepath))
 
-        # 4. Hand off to the processing pipeline
+    def _run(self):
+        """Poll queued files and release the ones that stopped changing."""
+        while True:
+            due, filepath = self._heap.get()
+            wait = due - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            with self._lock:
+                state = self._state.get(filepath)
+                if state is None or state[0] != due:
+                    continue  # superseded by a newer event for this path
+
+                size = _probe(filepath)
+                if size is None:
+                    del self._state[filepath]  # gone (e.g. a temp file that was renamed)
+                    continue
+
+                state[2] = state[2] + 1 if size == state[1] and size >= 0 else 0
+                state[1] = size
+                now = time.monotonic()
+
+                if state[2] < STABLE_ROUNDS and now < state[3]:
+                    # Still being written: look again shortly
+                    state[0] = now + STABLE_INTERVAL
+                    self._heap.put((state[0], filepath))
+                    continue
+
+                if state[2] < STABLE_ROUNDS:
+                    log.warning(f"[watcher] WARNING: '{filepath}' still changing after "
+                                f"{STABLE_TIMEOUT}s, processing anyway")
+                del self._state[filepath]
+
+            self.pipeline.submit(filepath, os.path.basename(filepath))
+
+
+def _probe(filepath: str):
+    """
+    One stability sample: the file's current size, or None if it has
+    disappeared. On Windows a file still held open by its writer can't be
+    opened for reading; that is reported as -1 so it never counts as stable.
+    Other stat errors (e.g. PermissionError) are reported as -1 too: the file
+    is released after STABLE_TIMEOUT and the pipeline reports the error.
+    """
+    try:
+        size = os.stat(filepath).st_size
+    except FileNotFoundError:
+        return None
+    except OSError:
+        return -1
+
+    if os.name == "nt":
         try:
-            self.handle_new_token(filepath, filename)
-        except Exception as e:
-            # Catch-all safety net to keep the watcher running even if a file fails
-            print(f"[watcher] ERROR processing '{filename}': {e}")
+            open(filepath, "rb").close()
+        except PermissionError:
+            return -1
+    return size
 
-    def handle_new_token(self, filepath: str, filename: str):
+
+class Pipeline:
+    """
+    Runs the per-file pipeline on an asyncio event loop in a background thread.
+    on_created() only drops paths into the queue; WORKERS coroutines pick
+    them up, a MiniBatcher groups their classifications into shared requests,
+    and at most MAX_CONCURRENT_CALLS requests are in flight at once so we
+    stay under the API's rate limit.
+    """
+
+    def __init__(self, workers: int = WORKERS,
+                 max_calls: int = MAX_CONCURRENT_CALLS,
+                 extract_workers: int = EXTRACT_WORKERS):
+        self.workers = workers
+        self.max_calls = max_calls
+        self.extract_workers = extract_workers
+        self.extract_pool = None
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._ready = threading.Event()
+
+    def start(self):
+        """Start the extraction processes and the event loop thread."""
+        # PDF parsing is CPU-bound, so it runs in separate processes (no GIL)
+        self.extract_pool = ProcessPoolExecutor(max_workers=self.extract_workers)
+        self._thread.start()
+        self._ready.wait()
+
+    def submit(self, filepath: str, filename: str):
+        """Thread-safe: queue a file from the watchdog observer thread."""
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, (filepath, filename))
+
+    def stop(self):
+        """
+        Wait for every queued file to finish, then shut the loop down.
+        If the wait is interrupted (a second Ctrl+C), the loop and the
+        extraction processes are still stopped, dropping unstarted work.
+        """
+        try:
+            asyncio.run_coroutine_threadsafe(self.queue.join(), self.loop).result()
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            if self.extract_pool is not None:
+                self.extract_pool.shutdown(cancel_futures=True)
+                self.extract_pool = None
+
+    def __enter__(self) -> "Pipeline":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _extract_executor(self, filepath: str):
+        """
+        Pick where to run extract_text_preview(): the process pool, or None (the
+        default thread pool) for small .txt files, where shipping the work
+        to another process costs more than reading the file.
+        """
+        if filepath.lower().endswith(".txt"):
+            try:
+                if os.path.getsize(filepath) < INLINE_EXTRACT_MAX_BYTES:
+                    return None
+            except OSError:
+                return None  # let extract_text_preview() report the problem
+        return self.extract_pool
+
+    def _run(self):
+        """Body of the background thread: create the queue and workers, then spin."""
+        asyncio.set_event_loop(self.loop)
+        self.queue = asyncio.Queue()
+        self.sem = asyncio.Semaphore(self.max_calls)
+        self.batcher = MiniBatcher(self.sem)
+        for _ in range(self.workers):
+            self.loop.create_task(self._worker())
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _worker(self):
+        """Pull files off the queue forever, one at a time."""
+        while True:
+            filepath, filename = await self.queue.get()
+            try:
+                await self.handle_new_token(filepath, filename)
+            except Exception as e:
+                # Catch-all safety net to keep the watcher running even if a file fails
+                log.error(f"[watcher] ERROR processing '{filename}': {e}")
+            finally:
+                self.queue.task_done()
+
+    async def handle_new_token(self, filepath: str, filename: str):
         """
         The Core Pipeline: Extract → Classify → Move → Log
-        Processes a newly detected file through the entire workflow.
+        Extraction runs in the process pool and other blocking steps (disk,
+        SQLite) in the default thread pool, so the event loop stays free for
+        other files' API calls.
         """
+        from classifier import keyword_classify, lookup_cached # Used to classify files.
+        from organizer import move_file # Used to move files.
+        from db import logger # Used to log files (shares the classifier cache's connection).
+        loop = asyncio.get_running_loop()
+
         # Step 1 — Extract text
+        # Unknown extensions are rejected without reading the file at all
+        if os.path.splitext(filename)[1].lower() not in SUPPORTED_EXTS:
+            log.info(f"[watcher] Unsupported file type, moving to _unsupported/")
+            await loop.run_in_executor(None, move_file, filepath, "_unsupported", filename)
+            return
+
         try:
-            text = extract_text(filepath)
+            text = await loop.run_in_executor(
+                self._extract_executor(filepath), extract_text_preview, filepath,
+            )
         except UnsupportedFileTypeError:
-            print(f"[watcher] Unsupported file type, moving to _unsupported/")
-            move_file(filepath, "_unsupported", filename)
+            log.info(f"[watcher] Unsupported file type, moving to _unsupported/")
+            await loop.run_in_executor(None, move_file, filepath, "_unsupported", filename)
             return
 
         # If file is empty or unreadable
         if not text.strip(): #text.strip() removes whitespace; if not ...: checks if empty.
-            print(f"[watcher] No text extracted, moving to _unclassified/")
-            move_file(filepath, "_unclassified", filename)
+            log.info(f"[watcher] No text extracted, moving to _unclassified/")
+            await loop.run_in_executor(None, move_file, filepath, "_unclassified", filename)
             return
 
-        # Step 2 — Classify via LLM (The "Brain")
-        print(f"[watcher] Classifying...")
-        result = classify_file(text, filename)
+        # Step 2 — Classify (The "Brain")
+        if len(text) < MIN_CLASSIFY_CHARS:
+            # Too little text for the LLM to do better than a keyword match
+            result = keyword_classify(text, filename)
+            if result is None:
+                log.info(f"[watcher] Too little text to classify, moving to _unclassified/")
+                await loop.run_in_executor(None, move_file, filepath, "_unclassified", filename)
+                return
+        else:
+            # Content we've seen before is answered from the cache straight away
+            result = await loop.run_in_executor(None, lookup_cached, text, filename)
+
+        if result is None:
+            # A long backlog is cheaper through the Batch API; otherwise classify now
+            if self.queue.qsize() >= BATCH_SIZE:
+                waiting = pending.put(filepath, filename, text)
+                log.info(f"[watcher] Backlog detected, queued '{filename}' for batch classification ({waiting} waiting)")
+                return
+
+            log.info(f"[watcher] Classifying '{filename}'...")
+            # Classified, moved and logged together with the rest of its mini-batch
+            await self.batcher.submit(filepath, filename, text)
+            return
 
-        category = result["category"]
-        new_name = result["suggested_filename"]
-        summary  = result["summary_sentence"]
+        # Step 3 — Move & rename
+        record = await loop.run_in_executor(None, _move, filepath, filename, result)
 
-        print(f"[watcher] Category : {category}")
-        print(f"[watcher] New name : {new_name}")
-        print(f"[watcher] Summary  : {summary}")
+        # Step 4 — Log to SQLite (The "Memory"); written in the background
+        logger.log_later(*record)
 
-        # Step 3 — Move & rename (The "Arm")
-        # specific destination path is returned by move_file
-        dest = move_file(filepath, category, new_name)
 
-        # Step 4 — Log to SQLite (The "Memory")
-        logger.log(filename, new_name, category, summary, dest)
+class MiniBatcher:
+    """
+    Coalesces the workers' files into classify_batch_async() calls: files are
+    collected until `size` are waiting or `window_ms` has passed since the
+    first one, then classified in one request, moved, and logged in one
+    transaction. Lives on the pipeline's event loop, so it needs no locking.
+    """
+
+    def __init__(self, sem: asyncio.Semaphore, size: int = MINI_BATCH_SIZE,
+                 window_ms: int = MINI_BATCH_WINDOW_MS):
+        self.sem = sem
+        self.size = size
+        self.window = window_ms / 1000
+        self._items = []     # (filepath, filename, text, future)
+        self._timer = None
+        self._tasks = set()  # in-flight requests (keeps them from being garbage collected)
 
-        print(f"[watcher] ✅ Done!\n")
+    def submit(self, filepath: str, filename: str, text: str) -> asyncio.Future:
+        """Queue a file; the returned future completes once it is moved and logged."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append((filepath, filename, text, future))
+
+        if len(self._items) >= self.size:
+            self._drain()
+        elif self._timer is None:
+            # First request of a new batch: start the countdown
+            self._timer = loop.call_later(self.window, self._drain)
+        return future
+
+    def _drain(self):
+        """Send everything currently waiting as one request."""
+        batch, self._items = self._items, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if batch:
+            task = asyncio.ensure_future(self._classify(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _classify(self, batch: list[tuple[str, str, str, asyncio.Future]]):
+        """Classify → Move → Log one batch, then complete each submitter's future."""
+        from classifier import classify_batch_async
+        if len(batch) > 1:
+            log.info(f"[watcher] Classifying {len(batch)} files in one request...")
+        try:
+            async with self.sem:
+                results = await classify_batch_async([(text, name) for _, name, text, _ in batch])
+            errors = await asyncio.get_running_loop().run_in_executor(
+                None, _move_and_log, [(path, name) for path, name, _, _ in batch], results,
+            )
+        except Exception as e:
+            errors = [e] * len(batch)
+
+        for (*_, future), error in zip(batch, errors):
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+
+class BatchQueue:
+    """
+    Debounced queue in front of classify_files_batch().
+    Collects extracted files and flushes them as one Batch API job
+    every `size` files or `window` seconds, whichever comes first.
+    Each job is polled on its own thread; flush() waits for all of them.
+    """
+
+    def __init__(self, size: int = BATCH_SIZE, window: float = BATCH_WINDOW):
+        self.size = size
+        self.window = window
+        self._items = []  # (filepath, filename, text)
+        self._lock = threading.Lock()
+        self._timer = None
+        self._workers = set()  # threads currently running _process()
+
+    def put(self, filepath: str, filename: str, text: str) -> int:
+        """Add a file to the queue and return how many are now waiting."""
+        with self._lock:
+            self._items.append((filepath, filename, text))
+            waiting = len(self._items)
+
+            if waiting >= self.size:
+                # Full: drain right away on a separate thread
+                self._spawn(self._take())
+            elif self._timer is None:
+                # First file of a new batch: start the countdown
+                self._timer = threading.Timer(self.window, self._expire)
+                self._timer.daemon = True
+                self._timer.start()
+
+        return waiting
+
+    def flush(self):
+        """
+        Classify everything currently waiting, then wait for the jobs already
+        running on other threads (used on shutdown, before the Batch API
+        client is closed).
+        """
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._process(batch)
+
+        while True:
+            with self._lock:
+                if not self._workers:
+                    return
+                worker = next(iter(self._workers))
+            worker.join()
+
+    def _expire(self):
+        """Timer callback: the window has passed, send whatever is waiting."""
+        with self._lock:
+            batch = self._take()
+            if batch:
+                self._spawn(batch)
+
+    def _spawn(self, batch: list[tuple[str, str, str]]):
+        """Process a batch on its own tracked thread. Caller holds the lock."""
+        worker = threading.Thread(target=self._run_worker, args=(batch,))
+        self._workers.add(worker)
+        worker.start()
+
+    def _run_worker(self, batch: list[tuple[str, str, str]]):
+        """Body of a batch thread: process the batch, then deregister."""
+        try:
+            self._process(batch)
+        except Exception as e:
+            log.error(f"[watcher] ERROR processing batch of {len(batch)} file(s): {e}")
+        finally:
+            with self._lock:
+                self._workers.discard(threading.current_thread())
+
+    def _take(self) -> list[tuple[str, str, str]]:
+        """Empty the queue and cancel the pending timer. Caller holds the lock."""
+        batch, self._items = self._items, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _process(self, batch: list[tuple[str, str, str]]):
+        """Classify → Move → Log every file in the batch."""
+        from classifier import classify_files_batch
+        log.info(f"\n[watcher] Classifying batch of {len(batch)} file(s)...")
+        results = classify_files_batch([(text, filename) for _, filename, text in batch])
+
+        errors = _move_and_log([(filepath, filename) for filepath, filename, _ in batch], results)
+        for (_, filename, _), error in zip(batch, errors):
+            if error is not None:
+                log.error(f"[watcher] ERROR processing '{filename}': {error}")
+
+
+def _move(filepath: str, filename: str, result: dict) -> tuple[str, str, str, str, str]:
+    """
+    Move a single file once its classification is known.
+    Returns the record to log: (original, new name, category, summary, dest).
+    """
+    from organizer import move_file
+    category = result["category"]
+    new_name = result["suggested_filename"]
+    summary  = result["summary_sentence"]
+
+    log.info(f"[watcher] {filename}")
+    log.info(f"[watcher] Category : {category}")
+    log.info(f"[watcher] New name : {new_name}")
+    log.info(f"[watcher] Summary  : {summary}")
+
+    # Step 3 — Move & rename (The "Arm")
+    # specific destination path is returned by move_file
+    dest = move_file(filepath, category, new_name)
+
+    log.info(f"[watcher] ✅ Done!\n")
+    return (filename, new_name, category, summary, dest)
+
+
+def _move_and_log(files: list[tuple[str, str]], results: list[dict]) -> list:
+    """
+    Move a group of classified (filepath, filename) files, then log them all
+    to SQLite in one transaction. Returns, per file, the exception that
+    stopped it from being moved, or None.
+    """
+    from db import logger
+    records, errors = [], []
+    for (filepath, filename), result in zip(files, results):
+        try:
+            records.append(_move(filepath, filename, result))
+            errors.append(None)
+        except Exception as e:
+            # Keep going so one bad file doesn't strand the rest of the batch
+            errors.append(e)
+
+    # Step 4 — Log the whole batch in one transaction
+    logger.log_many(records)
+    return errors
+
+
+# Shared queue that every FileHandler feeds into
+pending = BatchQueue()
+
+
+def _bootstrap(settler: Settler, root: str) -> int:
+    """
+    Queue the files that were already in the drop zone before the watcher
+    started. They go through the Settler like new files, since a copy may
+    still be in progress. os.scandir reports each entry's type along with
+    its name, so the scan needs no stat() per file. Subfolders are scanned
+    only if RECURSIVE. Returns the number of files queued.
+    """
+    queued = 0
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if _IGNORE_RE.match(entry.name):
+                continue
+            if entry.is_file(follow_symlinks=False):
+                settler.add(entry.path)
+                queued += 1
+            elif RECURSIVE and entry.is_dir(follow_symlinks=False):
+                queued += _bootstrap(settler, entry.path)
+    return queued
 
 
 def start_watcher():
@@ -115,31 +621,73 @@ def start_watcher():
     Start the background watchdog process.
     This is the 'Ignition Switch' of the application.
     """
-    # Create the drop zone if it doesn't exist
-    os.makedirs(DROP_ZONE, exist_ok=True)
+    from classifier import warm_up, close_clients
+    from db import logger
+    root = logging.getLogger()
+    root.addHandler(_log_handler)
+    project = [logging.getLogger(name) for name in _PROJECT_LOGGERS]
+    previous_levels = [project_log.level for project_log in project]
+    for project_log in project:
+        project_log.setLevel(logging.INFO)
+    _log_listener.start()
+    try:
+        # Create the drop zone if it doesn't exist
+        os.makedirs(DROP_ZONE, exist_ok=True)
 
-    handler = FileHandler()
-    observer = Observer()
-    
-    # Schedule the observer:
-    # This tells the observer to monitor the DROP_ZONE directory for file system events.
-    # recursive=True means we also watch subfolders inside input_drop_zone
-    observer.schedule(handler, DROP_ZONE, recursive=True)
-    observer.start()
+        # Connect to Gemini in the background so the first file doesn't wait for it
+        threading.Thread(target=warm_up, daemon=True).start()
 
-    print(f"👁  Watching '{DROP_ZONE}' for new files...")
-    print(f"   Drop a PDF or TXT file in there and watch the magic.")
-    print(f"   Press Ctrl+C to stop.\n")
+        # Leaving the `with` block waits for every queued file to finish
+        with Pipeline() as pipeline:
+            settler = Settler(pipeline)
+            settler.start()
 
-    # Keep the main thread alive so the background thread can work
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        # Handle Ctrl+C gracefully
-        observer.stop()
-        print("\n[watcher] Stopped.")
-    observer.join()
+            handler = FileHandler(settler)
+            observer = Observer()
+
+            # Schedule the observer:
+            # This tells the observer to monitor the DROP_ZONE directory for file system events.
+            # recursive=True (WATCHER_RECURSIVE=1) also watches subfolders inside input_drop_zone
+            observer.schedule(handler, DROP_ZONE, recursive=RECURSIVE)
+            observer.start()
+
+            # Pick up anything dropped while the watcher wasn't running. The
+            # observer is already running, so nothing falls between the two;
+            # a file seen by both is merged by the Settler.
+            backlog = _bootstrap(settler, DROP_ZONE)
+            if backlog:
+                log.info(f"[watcher] Found {backlog} file(s) already in the drop zone")
+
+            log.info(f"👁  Watching '{DROP_ZONE}' for new files...")
+            log.info(f"   Drop a PDF or TXT file in there and watch the magic.")
+            log.info(f"   Press Ctrl+C to stop.\n")
+
+            # Keep the main thread alive (asleep) until Ctrl+C sets the event
+            stop = threading.Event()
+            previous = signal.signal(signal.SIGINT, lambda *_: stop.set())
+            try:
+                while not stop.wait(STOP_POLL):
+                    pass
+            finally:
+                # A second Ctrl+C while queued files finish stops right away
+                signal.signal(signal.SIGINT, previous)
+
+            # Handle Ctrl+C gracefully
+            observer.stop()
+            log.info("\n[watcher] Finishing queued files before exit...")
+            observer.join()
+
+        # Then drain the Batch API queue and the background log writer
+        pending.flush()
+        logger.flush()
+        close_clients()
+        log.info("[watcher] Stopped.")
+    finally:
+        # Print whatever is still queued
+        _log_listener.stop()
+        root.removeHandler(_log_handler)
+        for project_log, level in zip(project, previous_levels):
+            project_log.setLevel(level)
 
 
 if __name__ == "__main__":